@@ -1,21 +1,26 @@
 import os
+import time
 import requests
 
-def call_podcast_endpoint(api_url, script_file_path, output_directory="output"):
+def call_podcast_endpoint(api_url, script_file_path, output_directory="output", poll_interval=5):
     """
-    Sends a POST request to the podcast endpoint with the script and
-    `main.flac`, `town.flac`, and `country.flac` from the current directory.
-    Downloads the generated podcast file based on the API response.
+    Submits a podcast job with the script and `main.flac`, `town.flac`, and
+    `country.flac` from the current directory, polls the job until it finishes
+    and downloads the generated podcast file. Servers with jobs disabled (the
+    default on Cloud Run) answer 503, and the podcast is then rendered with
+    the blocking /podcast/ request instead.
 
     Args:
         api_url (str): The base API URL (e.g., "https://example.com").
         script_file_path (str): Path to the story script file (required).
         output_directory (str): Directory to save the downloaded podcast file.
+        poll_interval (int): Seconds to wait between status checks.
 
     Returns:
-        dict: Response JSON from the API, or None if an error occurs.
+        dict: Final job status (or the blocking response) from the API, or None if an error occurs.
     """
-    url = f"{api_url}/podcast/"
+    url = f"{api_url}/podcast/jobs"
+    blocking_url = f"{api_url}/podcast/"
 
     # Define paths for the required audio files
     main_file_path = "main.flac"
@@ -37,13 +42,39 @@ def call_podcast_endpoint(api_url, script_file_path, output_directory="output"):
     }
 
     try:
-        # Send the POST request
+        # Submit the job; the server answers right away with a job id
         response = requests.post(url, files=files)
-        response.raise_for_status()  # Raise an exception for HTTP errors
-
-        # Parse the response
-        response_json = response.json()
-        print("Response:", response_json)
+        if response.status_code == 503:
+            print("Podcast jobs are disabled on this server, waiting for a blocking render instead")
+            for file in files.values():
+                file.seek(0)
+            response = requests.post(blocking_url, files=files)
+            response.raise_for_status()
+            response_json = response.json()
+            print("Response:", response_json)
+        else:
+            response.raise_for_status()  # Raise an exception for HTTP errors
+            job_id = response.json()["job_id"]
+            print(f"Podcast job queued: {job_id}")
+
+            # Poll until the render finishes
+            status_url = f"{api_url}/podcast/jobs/{job_id}"
+            while True:
+                status_response = requests.get(status_url)
+                status_response.raise_for_status()
+                response_json = status_response.json()
+                if response_json["status"] in ("completed", "failed"):
+                    break
+                print(
+                    f"{response_json['status']}: {response_json['segments_done']}/{response_json['segments_total']} segments, "
+                    f"ETA {response_json['eta_seconds']}s"
+                )
+                time.sleep(poll_interval)
+
+            print("Response:", response_json)
+            if response_json["status"] == "failed":
+                print(f"Error: {response_json['error']}")
+                return response_json
 
         # Fetch the generated file name
         podcast_name = response_json.get("output_file")
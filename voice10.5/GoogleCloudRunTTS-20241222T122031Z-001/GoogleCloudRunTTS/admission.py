@@ -0,0 +1,148 @@
+"""
+Admission control for synthesis requests.
+
+An instance only takes on work while the estimated wait for it stays under a
+threshold. The wait comes from the text already admitted and not yet finished:
+its length times the measured speaking rate (seconds of audio per character)
+is the audio still to render, and the measured real-time factor (wall seconds
+per second of audio, with whatever parallelism the instance has) turns that
+into time. Requests that would wait longer, or that find the queue full, are
+refused with the number of seconds after which they would be admitted, so
+clients can back off or go elsewhere instead of slowing every request down.
+
+This is accounting only: admitted requests still run through the service's own
+model lock or synthesis queue, which bound how much runs at once. Every route
+that uses the model takes a ticket, streams and background jobs included, so
+the estimate sees all the work on the instance.
+"""
+import math
+import threading
+import time
+from typing import Optional
+
+class Overloaded(Exception):
+    def __init__(self, retry_after: int, estimated_wait: float):
+        super().__init__(f"Server is busy, retry in {retry_after}s")
+        self.retry_after = retry_after
+        self.estimated_wait = estimated_wait
+
+class Ticket:
+    __slots__ = ("chars", "admitted_at", "finished")
+
+    def __init__(self, chars: int, admitted_at: float):
+        self.chars = chars
+        self.admitted_at = admitted_at
+        self.finished = False
+
+class AdmissionController:
+    # The real-time factor is sampled over at least this much busy time
+    SAMPLE_SECONDS = 1.0
+
+    def __init__(self, max_wait_seconds: float, max_queue: int, initial_rtf: float = 1.0,
+                 audio_seconds_per_char: float = 0.06, smoothing: float = 0.2):
+        self.max_wait_seconds = max_wait_seconds
+        self.max_queue = max_queue
+        self.rtf = initial_rtf
+        self.audio_seconds_per_char = audio_seconds_per_char
+        self.smoothing = smoothing
+        self.lock = threading.Lock()
+        self.admitted = 0
+        self.outstanding_chars = 0
+        # Last completion, or when the instance last went from idle to busy
+        self.progress_at = time.monotonic()
+        self.last_tick = self.progress_at
+        self.window_busy = 0.0
+        self.window_audio = 0.0
+        self.counters = {"accepted": 0, "rejected": 0, "completed": 0, "failed": 0}
+
+    def _cost(self, chars: int) -> float:
+        return chars * self.audio_seconds_per_char * self.rtf
+
+    def _backlog(self, now: float) -> float:
+        if not self.admitted:
+            return 0.0
+        # The time since the last completion has gone into the outstanding work
+        return max(0.0, self._cost(self.outstanding_chars) - (now - self.progress_at))
+
+    def _tick(self, now: float):
+        if self.admitted:
+            self.window_busy += now - self.last_tick
+        self.last_tick = now
+
+    def _smooth(self, current: float, sample: float) -> float:
+        return current + self.smoothing * (sample - current)
+
+    def estimate(self, chars: int) -> float:
+        """Seconds until a request for `chars` characters would finish if admitted now."""
+        with self.lock:
+            return self._backlog(time.monotonic()) + self._cost(chars)
+
+    def admit(self, chars: int) -> Ticket:
+        """
+        Admit a request for `chars` characters or raise Overloaded. Every ticket
+        must be handed back to finish().
+        """
+        now = time.monotonic()
+        with self.lock:
+            backlog = self._backlog(now)
+            wait = backlog + self._cost(chars)
+            retry_after = None
+            if self.admitted >= self.max_queue:
+                # Roughly when the next admitted request finishes
+                retry_after = backlog / self.admitted
+            elif self.admitted and wait > self.max_wait_seconds:
+                # When enough of the backlog has drained for this request to fit
+                retry_after = min(wait - self.max_wait_seconds, backlog)
+            if retry_after is not None:
+                self.counters["rejected"] += 1
+                raise Overloaded(max(1, math.ceil(retry_after)), wait)
+
+            self._tick(now)
+            if not self.admitted:
+                self.progress_at = now
+            self.admitted += 1
+            self.outstanding_chars += chars
+            self.counters["accepted"] += 1
+            return Ticket(chars, now)
+
+    def finish(self, ticket: Ticket, audio_seconds: Optional[float] = None, chars: Optional[int] = None):
+        """
+        Release an admitted request; releasing a ticket again does nothing.
+        `audio_seconds` is the length of the audio it rendered and refines the
+        estimates; leave it out if it failed. `chars` is how much of the text
+        that audio covers, when some of it was served from a cache.
+        """
+        now = time.monotonic()
+        with self.lock:
+            if ticket.finished:
+                return
+            ticket.finished = True
+            self._tick(now)
+            self.admitted -= 1
+            self.outstanding_chars -= ticket.chars
+            self.progress_at = now
+            if audio_seconds is None:
+                self.counters["failed"] += 1
+                return
+            self.counters["completed"] += 1
+            rendered_chars = ticket.chars if chars is None else chars
+            if rendered_chars:
+                self.audio_seconds_per_char = self._smooth(self.audio_seconds_per_char, audio_seconds / rendered_chars)
+            self.window_audio += audio_seconds
+            if self.window_busy >= self.SAMPLE_SECONDS and self.window_audio > 0:
+                self.rtf = self._smooth(self.rtf, self.window_busy / self.window_audio)
+                self.window_busy = 0.0
+                self.window_audio = 0.0
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                **self.counters,
+                "admitted": self.admitted,
+                "outstanding_chars": self.outstanding_chars,
+                "estimated_wait_seconds": round(self._backlog(time.monotonic()), 2),
+                "real_time_factor": round(self.rtf, 3),
+                "audio_seconds_per_char": round(self.audio_seconds_per_char, 4),
+                "max_wait_seconds": self.max_wait_seconds,
+                "max_queue": self.max_queue,
+            }
@@ -1,12 +1,36 @@
-from fastapi import FastAPI, UploadFile, HTTPException, File, Form, Response
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, UploadFile, HTTPException, File, Form, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import Optional
-import subprocess
+from typing import Optional, Dict, List
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from collections import OrderedDict
+from starlette.concurrency import run_in_threadpool
+import numpy as np
+import soundfile as sf
+import multiprocessing
+import threading
+import time
+import unicodedata
+import hashlib
+import json
+import struct
 import shutil
 import uuid
+import asyncio
+import weakref
+import tempfile
+import tomli
 import os
+import re
+from f5_tts.api import F5TTS
+from f5_tts.infer.utils_infer import remove_silence_for_generated_wav
+import podcast_worker
+import audio_encoding
+import output_storage
+import admission
+from text_segmentation import plan_chunks, plan_stream_chunks
 
 app = FastAPI()
 
@@ -23,17 +47,656 @@ app.add_middleware(
 class TTSRequest(BaseModel):
     text: str
 
+def instance_memory_bytes() -> int:
+    """Memory this container may use: its cgroup limit if it has one, else physical memory."""
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        # "max" or a huge number means no limit
+        if value.isdigit() and int(value) < 1 << 60:
+            return int(value)
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+
+INSTANCE_MEMORY_BYTES = instance_memory_bytes()
+
 # Constants for file paths
 BASE_DIR = "/workspace/F5-TTS"
 OUTPUT_DIR = f"{BASE_DIR}/output"
 VOICE_CLONE_DIR = f"{BASE_DIR}/src/f5_tts/infer/examples/basic"
 PODCAST_DIR = f"{BASE_DIR}/src/f5_tts/infer/examples/multi"
 STORY_TOML_PATH = f"{PODCAST_DIR}/story.toml"
+# Cloud Run's filesystem is held in the instance's memory, so the on-disk caches and
+# generated files share a budget carved out of it: a quarter each for the synthesis
+# cache and outputs, half for the segment cache
+DISK_BUDGET_BYTES = int(os.getenv("DISK_BUDGET_BYTES", INSTANCE_MEMORY_BYTES // 8))
+CACHE_DIR = os.getenv("TTS_CACHE_DIR", f"{BASE_DIR}/cache")
+CACHE_MEMORY_BYTES = int(os.getenv("TTS_CACHE_MEMORY_BYTES", 256 * 1024 * 1024))
+CACHE_DISK_BYTES = int(os.getenv("TTS_CACHE_DISK_BYTES", DISK_BUDGET_BYTES // 4))
+SEGMENT_CACHE_DIR = os.getenv("TTS_SEGMENT_CACHE_DIR", f"{BASE_DIR}/segment_cache")
+SEGMENT_CACHE_MEMORY_BYTES = int(os.getenv("TTS_SEGMENT_CACHE_MEMORY_BYTES", 256 * 1024 * 1024))
+SEGMENT_CACHE_DISK_BYTES = int(os.getenv("TTS_SEGMENT_CACHE_DISK_BYTES", DISK_BUDGET_BYTES // 2))
+PODCAST_WORKERS = int(os.getenv("PODCAST_WORKERS", 1))
+# Memory taken by each pool worker's own copy of the model
+PODCAST_WORKER_BYTES = int(os.getenv("PODCAST_WORKER_BYTES", 2 * 1024 * 1024 * 1024))
+# Processes used to render the segments of one podcast in parallel (1 renders in-process).
+# By default as many as fit beside the main model and one worker's worth of headroom,
+# at most one per core.
+PODCAST_PROCESSES = int(os.getenv(
+    "PODCAST_PROCESSES",
+    max(1, min(os.cpu_count() or 1, INSTANCE_MEMORY_BYTES // PODCAST_WORKER_BYTES - 2))
+))
+PODCAST_JOB_TTL = int(os.getenv("PODCAST_JOB_TTL", 24 * 60 * 60))
+# Jobs render after their 202 and live in this instance's memory, so on Cloud Run
+# (K_SERVICE is set) they stay off until the service is deployed with CPU always
+# allocated and session affinity; see the Dockerfile
+PODCAST_JOBS_ENABLED = os.getenv("PODCAST_JOBS_ENABLED", "0" if os.getenv("K_SERVICE") else "1") == "1"
+# Threads encoding FLAC/Opus/MP3 renditions of generated audio
+ENCODER_WORKERS = int(os.getenv("ENCODER_WORKERS", 2))
+# Generated files are removed once unserved for OUTPUT_TTL or when over OUTPUT_MAX_BYTES
+OUTPUT_MAX_BYTES = int(os.getenv("OUTPUT_MAX_BYTES", DISK_BUDGET_BYTES // 4))
+OUTPUT_TTL = int(os.getenv("OUTPUT_TTL", 24 * 60 * 60))
+OUTPUT_SWEEP_SECONDS = int(os.getenv("OUTPUT_SWEEP_SECONDS", 5 * 60))
+# Synthesis is refused with 429 once the estimated wait passes ADMISSION_MAX_WAIT_SECONDS
+# or ADMISSION_MAX_QUEUE requests are in flight
+ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", 60))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", 16))
+# Starting real-time factor until throughput has been measured
+ADMISSION_INITIAL_RTF = float(os.getenv("ADMISSION_INITIAL_RTF", 1.0))
+# Scratch directories holding each clone/podcast request's uploads
+WORKSPACE_DIR = os.getenv("WORKSPACE_DIR", f"{BASE_DIR}/workspaces")
+# Workspaces left behind by a crash are removed after this long
+WORKSPACE_TTL = int(os.getenv("WORKSPACE_TTL", 24 * 60 * 60))
+F5_TTS_PKG_DIR = f"{BASE_DIR}/src/f5_tts"
+
+# Same reference voice the CLI uses when no config is given (examples/basic/basic.toml)
+DEFAULT_REF_AUDIO = f"{VOICE_CLONE_DIR}/basic_ref_en.wav"
+DEFAULT_REF_TEXT = "Some call me nature, others call me mother nature."
 
 # Ensure directories exist
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 os.makedirs(VOICE_CLONE_DIR, exist_ok=True)
 os.makedirs(PODCAST_DIR, exist_ok=True)
+os.makedirs(WORKSPACE_DIR, exist_ok=True)
+
+class TTSEngine:
+    """
+    Long-lived F5-TTS model shared by every endpoint.
+
+    Weights and vocoder are loaded once when the process starts instead of once
+    per request through f5-tts_infer-cli.
+    """
+
+    def __init__(self, model_type: str = "F5-TTS", processes: int = 1, segment_cache=None):
+        self.model_type = model_type
+        # Rendered podcast lines, so a resubmitted script only renders what changed
+        self.segment_cache = segment_cache
+        self.model = F5TTS(model_type=model_type)
+        self.sample_rate = self.model.target_sample_rate
+        # The model is not safe to run from several threads at once
+        self.lock = threading.Lock()
+        self.processes = processes
+        self.pool: Optional[ProcessPoolExecutor] = None
+
+    def segment_pool(self) -> ProcessPoolExecutor:
+        # Started on first use; each worker loads its own copy of the model
+        with self.lock:
+            if self.pool is None:
+                self.pool = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=podcast_worker.init_worker,
+                    initargs=(self.model_type, max(1, (os.cpu_count() or 1) // self.processes))
+                )
+            return self.pool
+
+    def discard_pool(self, pool: ProcessPoolExecutor):
+        # A broken pool stays broken; the next segment_pool() call starts a new one
+        with self.lock:
+            if self.pool is pool:
+                self.pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def infer(self, gen_text: str, ref_audio: str = DEFAULT_REF_AUDIO, ref_text: str = DEFAULT_REF_TEXT):
+        with self.lock:
+            wav, sr, _ = self.model.infer(ref_file=ref_audio, ref_text=ref_text, gen_text=gen_text)
+        return wav
+
+    def save(self, wav, output_path: str, remove_silence: bool = False):
+        sf.write(output_path, wav, self.sample_rate)
+        if remove_silence:
+            remove_silence_for_generated_wav(output_path)
+
+    def synthesize(self, gen_text: str, output_path: str, ref_audio: str = DEFAULT_REF_AUDIO,
+                   ref_text: str = DEFAULT_REF_TEXT, remove_silence: bool = False):
+        wav = self.infer(gen_text, ref_audio, ref_text)
+        self.save(wav, output_path, remove_silence)
+        return output_path
+
+    def load_story(self, config_path: str):
+        with open(config_path, "rb") as f:
+            return self.parse_story(tomli.load(f))
+
+    def parse_story(self, config: dict):
+        """
+        Parse a multi-voice story config the same way `f5-tts_infer-cli -c` does:
+        `[voice]` tags in the script switch the reference voice, untagged text uses `main`.
+        Returns the ordered segments and whether silence should be removed.
+        """
+        voices = {"main": {"ref_audio": config["ref_audio"], "ref_text": config.get("ref_text", "")}}
+        voices.update({name: dict(voice) for name, voice in config.get("voices", {}).items()})
+        for voice in voices.values():
+            voice["ref_audio"] = resolve_example_path(voice["ref_audio"])
+
+        gen_text = config.get("gen_text", "")
+        if config.get("gen_file"):
+            with open(resolve_example_path(config["gen_file"]), "r", encoding="utf-8") as f:
+                gen_text = f.read()
+
+        segments = []
+        for chunk in re.split(r"(?=\[\w+\])", gen_text):
+            if not chunk.strip():
+                continue
+            match = re.match(r"\[(\w+)\]", chunk)
+            voice = match[1] if match and match[1] in voices else "main"
+            text = re.sub(r"\[(\w+)\]", "", chunk).strip()
+            if not text:
+                continue
+            segments.append({"voice": voice, "text": text, **voices[voice]})
+
+        if not segments:
+            raise ValueError("Script contains no text to synthesize")
+        return segments, config.get("remove_silence", False)
+
+    def segment_key(self, segment: dict) -> str:
+        return SynthesisCache.make_key(
+            segment["text"],
+            voice=file_fingerprint(segment["ref_audio"]),
+            ref_text=segment["ref_text"],
+            model=self.model_type
+        )
+
+    def render_segments(self, segments: List[dict], output_path: str, remove_silence: bool = False, progress=None):
+        """
+        Render segments in order and join them, reusing cached lines and synthesizing only the rest.
+        `progress(index, cached)` is called as each segment becomes available.
+        """
+        wavs = [None] * len(segments)
+        keys = [self.segment_key(segment) for segment in segments]
+        pending = []
+        for index, key in enumerate(keys):
+            cached = self.segment_cache.get(key) if self.segment_cache else None
+            if cached is not None:
+                wavs[index] = np.frombuffer(cached, dtype=np.float32)
+                if progress:
+                    progress(index, True)
+            else:
+                pending.append(index)
+
+        def rendered(index, wav):
+            wavs[index] = wav
+            if self.segment_cache:
+                self.segment_cache.put(keys[index], np.asarray(wav, dtype=np.float32).tobytes())
+            if progress:
+                progress(index, False)
+
+        if self.processes > 1 and len(pending) > 1:
+            self.render_segments_parallel(segments, pending, rendered)
+        else:
+            for index in pending:
+                segment = segments[index]
+                rendered(index, self.infer(segment["text"], segment["ref_audio"], segment["ref_text"]))
+
+        self.save(np.concatenate(wavs), output_path, remove_silence)
+        return output_path
+
+    def render_segments_parallel(self, segments: List[dict], indices: List[int], rendered):
+        """
+        Render the given segments across the process pool, handing each result to
+        `rendered(index, wav)` as it completes. If a worker dies the pool is
+        replaced and the segments still missing are rendered in-process.
+        """
+        pool = self.segment_pool()
+        done = set()
+        futures = {
+            pool.submit(
+                podcast_worker.render_segment,
+                segments[index]["text"],
+                segments[index]["ref_audio"],
+                segments[index]["ref_text"]
+            ): index
+            for index in indices
+        }
+        try:
+            for future in as_completed(futures):
+                index = futures[future]
+                rendered(index, future.result())
+                done.add(index)
+        except BrokenProcessPool as e:
+            # Most likely a worker killed for running out of memory
+            print(f"Segment worker died, rendering in-process: {e}")
+            self.discard_pool(pool)
+            for index in indices:
+                if index not in done:
+                    segment = segments[index]
+                    rendered(index, self.infer(segment["text"], segment["ref_audio"], segment["ref_text"]))
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+
+    def synthesize_story(self, config: dict, output_path: str):
+        segments, remove_silence = self.parse_story(config)
+        return self.render_segments(segments, output_path, remove_silence)
+
+def resolve_example_path(path: str) -> str:
+    # Config paths like "infer/examples/multi/main.flac" are relative to the f5_tts package
+    if "infer/examples/" in path and not os.path.isabs(path):
+        return os.path.join(F5_TTS_PKG_DIR, path)
+    return path
+
+class SynthesisCache:
+    """
+    Content-addressed cache of rendered audio bytes.
+
+    Entries are keyed on the normalized text, a fingerprint of the reference voice
+    and every generation parameter. A small in-memory LRU sits in front of an
+    on-disk tier; both are bounded by a byte budget and evict least recently used
+    entries first.
+    """
+
+    def __init__(self, cache_dir: str, max_memory_bytes: int, max_disk_bytes: int, suffix: str = ".wav"):
+        self.cache_dir = cache_dir
+        self.suffix = suffix
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self.memory_bytes = 0
+        self.disk: "OrderedDict[str, int]" = OrderedDict()
+        self.disk_bytes = 0
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        self.lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_disk_index()
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        return " ".join(unicodedata.normalize("NFC", text).split())
+
+    @classmethod
+    def make_key(cls, text: str, voice: str, **params) -> str:
+        payload = json.dumps(
+            {"text": cls.normalize_text(text), "voice": voice, "params": params},
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}{self.suffix}")
+
+    def _load_disk_index(self):
+        # Rebuild the disk tier from a previous run, oldest access first
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(self.suffix):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_atime, name[:-len(self.suffix)], stat.st_size))
+        for _, key, size in sorted(entries):
+            self.disk[key] = size
+            self.disk_bytes += size
+        self._evict_disk()
+
+    def _evict_memory(self):
+        while self.memory_bytes > self.max_memory_bytes and self.memory:
+            _, data = self.memory.popitem(last=False)
+            self.memory_bytes -= len(data)
+
+    def _evict_disk(self):
+        while self.disk_bytes > self.max_disk_bytes and self.disk:
+            key, size = self.disk.popitem(last=False)
+            self.disk_bytes -= size
+            self.counters["evictions"] += 1
+            try:
+                os.remove(self._disk_path(key))
+            except FileNotFoundError:
+                pass
+
+    def _remember(self, key: str, data: bytes):
+        if len(data) > self.max_memory_bytes:
+            return
+        if key in self.memory:
+            self.memory_bytes -= len(self.memory.pop(key))
+        self.memory[key] = data
+        self.memory_bytes += len(data)
+        self._evict_memory()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self.lock:
+            data = self.memory.get(key)
+            if data is not None:
+                self.memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return data
+            if key in self.disk:
+                try:
+                    with open(self._disk_path(key), "rb") as f:
+                        data = f.read()
+                except FileNotFoundError:
+                    self.disk_bytes -= self.disk.pop(key)
+                else:
+                    self.disk.move_to_end(key)
+                    self.counters["disk_hits"] += 1
+                    self._remember(key, data)
+                    return data
+            self.counters["misses"] += 1
+            return None
+
+    def put(self, key: str, data: bytes):
+        with self.lock:
+            self._remember(key, data)
+            if key in self.disk or len(data) > self.max_disk_bytes:
+                return
+            tmp_path = f"{self._disk_path(key)}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._disk_path(key))
+            self.disk[key] = len(data)
+            self.disk_bytes += len(data)
+            self._evict_disk()
+
+    def stats(self) -> dict:
+        with self.lock:
+            hits = self.counters["memory_hits"] + self.counters["disk_hits"]
+            lookups = hits + self.counters["misses"]
+            return {
+                **self.counters,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self.memory),
+                "memory_bytes": self.memory_bytes,
+                "disk_entries": len(self.disk),
+                "disk_bytes": self.disk_bytes,
+            }
+
+_fingerprints: Dict[str, tuple] = {}
+# Request threads fill the memo while cleanup removes entries from it
+_fingerprints_lock = threading.Lock()
+
+def file_fingerprint(path: str) -> str:
+    """Content hash of a file, memoized on its size and mtime."""
+    stat = os.stat(path)
+    version = (stat.st_size, stat.st_mtime_ns)
+    with _fingerprints_lock:
+        memo = _fingerprints.get(path)
+    if memo is None or memo[0] != version:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        memo = (version, digest.hexdigest())
+        with _fingerprints_lock:
+            _fingerprints[path] = memo
+    return memo[1]
+
+def forget_fingerprint(path: str):
+    with _fingerprints_lock:
+        _fingerprints.pop(path, None)
+
+def create_workspace() -> str:
+    """
+    Private scratch directory for one request's uploads, so concurrent clone and
+    podcast requests never share reference files.
+    """
+    return tempfile.mkdtemp(prefix="request_", dir=WORKSPACE_DIR)
+
+def remove_workspace(workspace: str):
+    prefix = workspace + os.sep
+    with _fingerprints_lock:
+        for path in [path for path in _fingerprints if path.startswith(prefix)]:
+            del _fingerprints[path]
+    shutil.rmtree(workspace, ignore_errors=True)
+
+def sweep_workspaces():
+    # Workspaces are removed when their request finishes; this only catches leftovers
+    cutoff = time.time() - WORKSPACE_TTL
+    for entry in os.scandir(WORKSPACE_DIR):
+        try:
+            if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                remove_workspace(entry.path)
+        except FileNotFoundError:
+            pass
+
+def save_upload(upload: UploadFile, path: str, description: str):
+    try:
+        with open(path, "wb") as buffer:
+            shutil.copyfileobj(upload.file, buffer)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to save {description}: {str(e)}")
+
+synthesis_cache = SynthesisCache(CACHE_DIR, CACHE_MEMORY_BYTES, CACHE_DISK_BYTES)
+segment_cache = SynthesisCache(
+    SEGMENT_CACHE_DIR, SEGMENT_CACHE_MEMORY_BYTES, SEGMENT_CACHE_DISK_BYTES, suffix=".pcm"
+)
+
+# Load the model once at process start
+tts_engine = TTSEngine(processes=PODCAST_PROCESSES, segment_cache=segment_cache)
+encoder_pool = audio_encoding.EncoderPool(ENCODER_WORKERS)
+output_store = output_storage.OutputStore(
+    OUTPUT_DIR, OUTPUT_MAX_BYTES, OUTPUT_TTL, on_remove=forget_fingerprint
+)
+admission_controller = admission.AdmissionController(
+    ADMISSION_MAX_WAIT_SECONDS, ADMISSION_MAX_QUEUE, ADMISSION_INITIAL_RTF
+)
+
+def admit(chars: int) -> admission.Ticket:
+    """Admit `chars` characters of synthesis, or refuse with 429 and a Retry-After."""
+    try:
+        return admission_controller.admit(chars)
+    except admission.Overloaded as e:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Server is busy, estimated wait {e.estimated_wait:.0f}s",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+@app.on_event("startup")
+async def start_output_janitor():
+    async def sweep():
+        while True:
+            await asyncio.sleep(OUTPUT_SWEEP_SECONDS)
+            try:
+                await run_in_threadpool(output_store.sweep)
+                await run_in_threadpool(sweep_workspaces)
+            except Exception as e:
+                print(f"Output sweep failed: {e}")
+    # Keep a reference so the task isn't garbage collected
+    app.state.output_janitor = asyncio.create_task(sweep())
+
+class PodcastJob:
+    """
+    Background podcast render with per-segment progress.
+
+    Jobs and their output exist only on the instance that accepted them and are
+    lost when it shuts down. Rendering outside a request needs CPU that isn't
+    throttled, and polls need to reach the same instance.
+    """
+
+    def __init__(self, segments: List[dict], remove_silence: bool, workspace: Optional[str] = None,
+                 ticket: Optional[admission.Ticket] = None):
+        self.job_id = uuid.uuid4().hex
+        self.segments = segments
+        self.remove_silence = remove_silence
+        # Holds the reference audio the segments point at; removed once the render ends
+        self.workspace = workspace
+        # Admission for the whole render, held while queued and released when it ends
+        self.ticket = ticket
+        self.status = "queued"
+        self.segments_done = 0
+        self.segments_cached = 0
+        self.chars_done = 0
+        self.chars_cached = 0
+        self.total_chars = sum(len(segment["text"]) for segment in segments)
+        self.output_file: Optional[str] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def run(self):
+        self.status = "running"
+        self.started_at = time.time()
+        output_filename = f"podcast_{self.job_id}.wav"
+        audio_seconds = None
+        try:
+            output_path = output_store.path_for(output_filename)
+            tts_engine.render_segments(
+                self.segments,
+                output_path,
+                self.remove_silence,
+                progress=self.segment_done
+            )
+            audio_seconds = sf.info(output_path).duration
+            output_store.register(output_filename)
+            self.output_file = output_filename
+            self.status = "completed"
+        except Exception as e:
+            self.error = f"Inference Error: {str(e)}"
+            self.status = "failed"
+        finally:
+            self.finished_at = time.time()
+            if self.ticket:
+                admission_controller.finish(self.ticket, audio_seconds)
+            if self.workspace:
+                remove_workspace(self.workspace)
+
+    def segment_done(self, index: int, cached: bool = False):
+        chars = len(self.segments[index]["text"])
+        self.segments_done += 1
+        self.chars_done += chars
+        if cached:
+            self.segments_cached += 1
+            self.chars_cached += chars
+
+    def eta_seconds(self) -> Optional[float]:
+        # Extrapolate from the time spent per character on the segments actually rendered
+        rendered_chars = self.chars_done - self.chars_cached
+        if self.status != "running" or not rendered_chars:
+            return None
+        elapsed = time.time() - self.started_at
+        return elapsed / rendered_chars * (self.total_chars - self.chars_done)
+
+    def to_dict(self) -> dict:
+        eta = self.eta_seconds()
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "segments_total": len(self.segments),
+            "segments_done": self.segments_done,
+            "segments_cached": self.segments_cached,
+            "progress": self.chars_done / self.total_chars if self.total_chars else 0.0,
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+            "estimated_completion": time.time() + eta if eta is not None else None,
+            "output_file": self.output_file,
+            "error": self.error,
+        }
+
+podcast_jobs: Dict[str, PodcastJob] = {}
+podcast_executor = ThreadPoolExecutor(max_workers=PODCAST_WORKERS)
+
+def prune_podcast_jobs():
+    cutoff = time.time() - PODCAST_JOB_TTL
+    for job_id, job in list(podcast_jobs.items()):
+        if job.finished_at and job.finished_at < cutoff:
+            podcast_jobs.pop(job_id, None)
+
+def wav_stream_header(sample_rate: int, channels: int = 1, sample_width: int = 2) -> bytes:
+    """
+    WAV header for a stream of unknown length. The RIFF and data sizes are set to
+    the maximum so players keep reading until the connection closes.
+    """
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 0xFFFFFFFF, b"WAVE",
+        b"fmt ", 16, 1, channels, sample_rate,
+        sample_rate * channels * sample_width, channels * sample_width, sample_width * 8,
+        b"data", 0xFFFFFFFF
+    )
+
+def to_pcm16(wav) -> bytes:
+    return (np.clip(wav, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+def parse_range(header: Optional[str], size: int):
+    """
+    The (start, end) byte span, end exclusive, of a single-range Range header.
+    Returns None to serve the whole file (no header, or several ranges) and
+    raises ValueError when the range can't be satisfied.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if not first:
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length <= 0:
+                raise ValueError("Empty suffix range")
+            return max(0, size - length), size
+        start = int(first)
+        end = min(int(last) + 1, size) if last else size
+    except ValueError:
+        raise ValueError(f"Invalid range: {header}")
+    if start >= size or end <= start:
+        raise ValueError(f"Range not satisfiable: {header}")
+    return start, end
+
+def iter_file_range(path: str, start: int, end: int, chunk_size: int = 256 * 1024):
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+async def serve_audio_file(request: Request, path: str, media_type: str, headers: Optional[Dict[str, str]] = None):
+    """
+    Serve an output file with a content-hash ETag. Handles If-None-Match (304),
+    single byte ranges (206) and If-Range. Outputs never change once written, so
+    they are cacheable for a year.
+    """
+    etag = '"{}"'.format((await run_in_threadpool(file_fingerprint, path))[:32])
+    size = os.path.getsize(path)
+    headers = {
+        **(headers or {}),
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "public, max-age=31536000, immutable",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in [
+        candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")
+    ]):
+        return Response(status_code=304, headers=headers)
+
+    # A range is only honoured for the representation the client already has part of
+    if_range = request.headers.get("if-range")
+    if if_range is None or if_range.strip() == etag:
+        try:
+            byte_range = parse_range(request.headers.get("range"), size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        if byte_range is not None:
+            start, end = byte_range
+            return StreamingResponse(iter_file_range(path, start, end), status_code=206, media_type=media_type, headers={
+                **headers,
+                "Content-Range": f"bytes {start}-{end - 1}/{size}",
+                "Content-Length": str(end - start),
+            })
+    return FileResponse(path, media_type=media_type, headers=headers)
 
 @app.get("/")
 def root():
@@ -42,23 +705,104 @@ def root():
 @app.post("/synthesize/")
 def synthesize(request: TTSRequest):
     """
-    Basic text-to-speech synthesis.
+    Basic text-to-speech synthesis. Uncached text is refused with 429 and a
+    Retry-After when the instance is too busy to render it in time.
     """
+    chunks = plan_chunks(request.text)
+    if not chunks:
+        raise HTTPException(status_code=400, detail="Text is empty")
+
     output_filename = f"output_{uuid.uuid4().hex}.wav"
-    output_path = os.path.join(OUTPUT_DIR, output_filename)
+    output_path = output_store.path_for(output_filename)
 
     try:
-        subprocess.run([
-            "f5-tts_infer-cli",
-            "--gen_text", request.text,
-            "--output_dir", OUTPUT_DIR,
-            "--output_file", output_filename
-        ], check=True)
+        cache_key = synthesis_cache.make_key(
+            request.text,
+            voice=file_fingerprint(DEFAULT_REF_AUDIO),
+            ref_text=DEFAULT_REF_TEXT
+        )
+        cached = synthesis_cache.get(cache_key)
+        if cached is not None:
+            with open(output_path, "wb") as f:
+                f.write(cached)
+            output_store.register(output_filename)
+            return {"message": "Speech synthesis complete!", "output_file": output_filename, "cached": True}
+
+        ticket = admit(len(request.text))
+        try:
+            # Long text is rendered as independent chunks (in parallel on the segment pool)
+            segments = [
+                {"voice": "main", "text": chunk, "ref_audio": DEFAULT_REF_AUDIO, "ref_text": DEFAULT_REF_TEXT}
+                for chunk in chunks
+            ]
+            tts_engine.render_segments(segments, output_path)
+        except Exception:
+            admission_controller.finish(ticket)
+            raise
+        admission_controller.finish(ticket, sf.info(output_path).duration)
+        output_store.register(output_filename)
+        with open(output_path, "rb") as f:
+            synthesis_cache.put(cache_key, f.read())
 
         return {"message": "Speech synthesis complete!", "output_file": output_filename}
-    except subprocess.CalledProcessError as e:
-        raise HTTPException(status_code=500, detail=f"CLI Error: {str(e)}")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Inference Error: {str(e)}")
 
+@app.post("/synthesize/stream/")
+def synthesize_stream(request: TTSRequest, format: str = "wav"):
+    """
+    Streaming text-to-speech: audio for each sentence is sent as soon as it is generated.
+    `format=wav` streams a WAV file, `format=pcm` streams raw 16-bit little-endian
+    mono PCM described by the X-Sample-* headers. Sentences that were rendered
+    before come from the segment cache.
+    """
+    if format not in ("wav", "pcm"):
+        raise HTTPException(status_code=400, detail="format must be 'wav' or 'pcm'")
+    sentences = plan_stream_chunks(request.text)
+    if not sentences:
+        raise HTTPException(status_code=400, detail="Text is empty")
+
+    sample_rate = tts_engine.sample_rate
+    # Admitted as a whole: once the response has started it can't be refused
+    ticket = admit(len(request.text))
+
+    def audio_stream():
+        rendered_samples = 0
+        rendered_chars = 0
+        completed = False
+        try:
+            if format == "wav":
+                yield wav_stream_header(sample_rate)
+            for sentence in sentences:
+                key = tts_engine.segment_key({"text": sentence, "ref_audio": DEFAULT_REF_AUDIO, "ref_text": DEFAULT_REF_TEXT})
+                cached = segment_cache.get(key)
+                if cached is not None:
+                    wav = np.frombuffer(cached, dtype=np.float32)
+                else:
+                    wav = tts_engine.infer(sentence)
+                    segment_cache.put(key, np.asarray(wav, dtype=np.float32).tobytes())
+                    rendered_samples += len(wav)
+                    rendered_chars += len(sentence)
+                yield to_pcm16(wav)
+            completed = True
+        finally:
+            admission_controller.finish(
+                ticket, rendered_samples / sample_rate if completed else None, rendered_chars
+            )
+
+    stream = audio_stream()
+    # A stream dropped before its first chunk never runs, so release its ticket when it is collected
+    weakref.finalize(stream, admission_controller.finish, ticket)
+
+    # audio/L16 would mean big-endian (RFC 2586), so raw PCM goes out untyped
+    media_type = "audio/wav" if format == "wav" else "application/octet-stream"
+    return StreamingResponse(stream, media_type=media_type, headers={
+        "X-Sample-Rate": str(sample_rate),
+        "X-Channels": "1",
+        "X-Sample-Format": "s16le"
+    })
 
 #voiceclone with ref text from frontend
 @app.post("/voiceClone/")
@@ -74,31 +818,29 @@ async def voice_clone(
     if not audio_file.filename.endswith('.wav'):
         raise HTTPException(status_code=400, detail="File must be a WAV file")
 
-    # Save the uploaded file as basic_ref_en.wav (This is where the issue was)
-    ref_path = os.path.join(VOICE_CLONE_DIR, "basic_ref_en.wav")
+    ticket = admit(len(text))
+    # The reference lives in this request's own workspace, not the shared example voice
+    workspace = create_workspace()
     try:
-        with open(ref_path, "wb") as buffer:
-            shutil.copyfileobj(audio_file.file, buffer)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to save audio file: {str(e)}")
+        ref_path = os.path.join(workspace, "ref.wav")
+        save_upload(audio_file, ref_path, "audio file")
 
-    # Generate output filename
-    output_filename = f"clone_{uuid.uuid4().hex}.wav"
-    output_path = os.path.join(OUTPUT_DIR, output_filename)
+        # Generate output filename
+        output_filename = f"clone_{uuid.uuid4().hex}.wav"
+        output_path = output_store.path_for(output_filename)
 
-    try:
-        # Assuming f5-tts_infer-cli supports a --ref_text argument. Verify this!
-        subprocess.run([
-            "f5-tts_infer-cli",
-            "--gen_text", text,
-            "--ref_text", ref_text,  # Added ref_text to the command
-            "--output_dir", OUTPUT_DIR,
-            "--output_file", output_filename
-        ], check=True)
+        try:
+            await run_in_threadpool(tts_engine.synthesize, text, output_path, ref_path, ref_text)
+            admission_controller.finish(ticket, sf.info(output_path).duration)
+            output_store.register(output_filename)
 
-        return {"message": "Voice cloning complete!", "output_file": output_filename}
-    except subprocess.CalledProcessError as e:
-        raise HTTPException(status_code=500, detail=f"CLI Error: {str(e)}")
+            return {"message": "Voice cloning complete!", "output_file": output_filename}
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Inference Error: {str(e)}")
+    finally:
+        # Does nothing if it was already released with the audio's length
+        admission_controller.finish(ticket)
+        remove_workspace(workspace)
 
 
 
@@ -149,50 +891,174 @@ async def create_podcast(
     """
     Create a podcast using multiple voice files and a script.
     """
-    # Save the script
-    script_path = os.path.join(PODCAST_DIR, "story.txt")
+    workspace = create_workspace()
+    ticket = None
     try:
-        with open(script_path, "wb") as buffer:
-            shutil.copyfileobj(script.file, buffer)
+        config = save_podcast_inputs(workspace, script, main, town, country)
+        try:
+            segments, remove_silence = tts_engine.parse_story(config)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Invalid script: {str(e)}")
+        ticket = admit(sum(len(segment["text"]) for segment in segments))
+
+        # Generate output filename
+        output_filename = f"podcast_{uuid.uuid4().hex}.wav"
+        output_path = output_store.path_for(output_filename)
+
+        try:
+            await run_in_threadpool(tts_engine.render_segments, segments, output_path, remove_silence)
+            admission_controller.finish(ticket, sf.info(output_path).duration)
+            output_store.register(output_filename)
+
+            return {"message": "Podcast creation complete!", "output_file": output_filename}
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Inference Error: {str(e)}")
+    finally:
+        if ticket:
+            admission_controller.finish(ticket)
+        remove_workspace(workspace)
+
+@app.post("/podcast/jobs", status_code=202)
+async def create_podcast_job(
+    script: UploadFile = File(...),
+    main: Optional[UploadFile] = File(None),
+    town: Optional[UploadFile] = File(None),
+    country: Optional[UploadFile] = File(None)
+):
+    """
+    Queue a podcast render and return immediately with a job id to poll.
+    """
+    if not PODCAST_JOBS_ENABLED:
+        raise HTTPException(
+            status_code=503,
+            detail="Podcast jobs need CPU always allocated and session affinity; use /podcast/ instead"
+        )
+    workspace = create_workspace()
+    try:
+        config = save_podcast_inputs(workspace, script, main, town, country)
+        segments, remove_silence = tts_engine.parse_story(config)
+    except HTTPException:
+        remove_workspace(workspace)
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to save script: {str(e)}")
+        remove_workspace(workspace)
+        raise HTTPException(status_code=400, detail=f"Invalid script: {str(e)}")
+    try:
+        # Queued jobs count too: they will take the model ahead of later requests
+        ticket = admit(sum(len(segment["text"]) for segment in segments))
+    except HTTPException:
+        remove_workspace(workspace)
+        raise
+
+    prune_podcast_jobs()
+    # The job owns the workspace and ticket from here and releases both when the render ends
+    job = PodcastJob(segments, remove_silence, workspace, ticket)
+    podcast_jobs[job.job_id] = job
+    podcast_executor.submit(job.run)
+
+    return {
+        "message": "Podcast queued",
+        "job_id": job.job_id,
+        "status_url": f"/podcast/jobs/{job.job_id}"
+    }
+
+@app.get("/podcast/jobs/{job_id}")
+def get_podcast_job(job_id: str):
+    """
+    Report progress, estimated completion and the output file of a podcast job.
+    """
+    job = podcast_jobs.get(job_id)
+    if not job:
+        # Also what a poll routed to a different instance sees
+        raise HTTPException(status_code=404, detail="Podcast job not found on this instance")
+    return job.to_dict()
+
+def save_podcast_inputs(
+    workspace: str,
+    script: UploadFile,
+    main: Optional[UploadFile],
+    town: Optional[UploadFile],
+    country: Optional[UploadFile]
+) -> dict:
+    """
+    Save the script and any uploaded voices into `workspace` and return a story
+    config pointing at them. Voices that weren't uploaded keep the reference
+    audio from the example story.toml.
+    """
+    try:
+        with open(STORY_TOML_PATH, "rb") as f:
+            config = tomli.load(f)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load story config: {str(e)}")
+    config["voices"] = {name: dict(voice) for name, voice in config.get("voices", {}).items()}
+
+    # Save the script
+    script_path = os.path.join(workspace, "story.txt")
+    save_upload(script, script_path, "script")
+    config.pop("gen_text", None)
+    config["gen_file"] = script_path
 
     # Save optional voice files if provided
     for voice_file, voice_name in [
-        (main, "main.flac"),
-        (town, "town.flac"),
-        (country, "country.flac")
+        (main, "main"),
+        (town, "town"),
+        (country, "country")
     ]:
         if voice_file:
-            voice_path = os.path.join(PODCAST_DIR, voice_name)
-            try:
-                with open(voice_path, "wb") as buffer:
-                    shutil.copyfileobj(voice_file.file, buffer)
-            except Exception as e:
-                raise HTTPException(status_code=500, detail=f"Failed to save {voice_name}: {str(e)}")
-
-    # Generate output filename
-    output_filename = f"podcast_{uuid.uuid4().hex}.wav"
-    output_path = os.path.join(OUTPUT_DIR, output_filename)
-
-    try:
-        subprocess.run([
-            "f5-tts_infer-cli",
-            "-c", STORY_TOML_PATH,
-            "--output_dir", OUTPUT_DIR,
-            "--output_file", output_filename
-        ], check=True)
+            voice_path = os.path.join(workspace, f"{voice_name}.flac")
+            save_upload(voice_file, voice_path, f"{voice_name}.flac")
+            if voice_name == "main":
+                config["ref_audio"] = voice_path
+            else:
+                config["voices"].setdefault(voice_name, {"ref_text": ""})["ref_audio"] = voice_path
+    return config
 
-        return {"message": "Podcast creation complete!", "output_file": output_filename}
-    except subprocess.CalledProcessError as e:
-        raise HTTPException(status_code=500, detail=f"CLI Error: {str(e)}")
+@app.get("/cache/stats")
+def cache_stats():
+    """
+    Hit/miss statistics for the synthesis and podcast segment caches, encoder
+    activity, the size of the output directory and admission control.
+    """
+    return {
+        "synthesis": synthesis_cache.stats(),
+        "segments": segment_cache.stats(),
+        "encoder": encoder_pool.stats(),
+        "outputs": output_store.stats(),
+        "admission": admission_controller.stats(),
+    }
 
 @app.get("/audio/{filename}")
-async def get_audio(filename: str):
+async def get_audio(filename: str, request: Request, format: Optional[str] = None):
     """
-    Retrieve a generated audio file.
+    Retrieve a generated audio file, encoded as `format` (wav, flac, opus, mp3) or
+    the best match for the Accept header. Encoded renditions are stored alongside
+    the WAV under their own names, so each is encoded once.
     """
-    file_path = os.path.join(OUTPUT_DIR, filename)
-    if not os.path.exists(file_path):
+    # Served from the index; the directory is never listed
+    file_path = output_store.lookup(filename)
+    if file_path is None:
         raise HTTPException(status_code=404, detail="Audio file not found")
-    return FileResponse(file_path, media_type="audio/wav")
\ No newline at end of file
+
+    if format is None:
+        format = audio_encoding.negotiate(request.headers.get("accept"))
+        if format is None:
+            raise HTTPException(status_code=406, detail="Available formats: " + ", ".join(audio_encoding.FORMATS))
+    elif format not in audio_encoding.FORMATS:
+        raise HTTPException(status_code=400, detail="format must be one of " + ", ".join(audio_encoding.FORMATS))
+
+    if format != "wav" and filename.endswith(".wav"):
+        try:
+            rendition_name = os.path.splitext(filename)[0] + audio_encoding.FORMATS[format].extension
+            file_path = await encoder_pool.rendition(file_path, format, output_store.path_for(rendition_name))
+            output_store.register(rendition_name)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Encoding Error: {str(e)}")
+    else:
+        # Renditions are only made from WAVs; anything else is served as stored
+        format = next(
+            (name for name, audio_format in audio_encoding.FORMATS.items() if filename.endswith(audio_format.extension)),
+            "wav"
+        )
+    return await serve_audio_file(
+        request, file_path, audio_encoding.FORMATS[format].media_type, headers={"Vary": "Accept"}
+    )
\ No newline at end of file
@@ -0,0 +1,63 @@
+import argparse
+import time
+from importlib.resources import files
+import numpy as np
+from f5_tts.api import F5TTS
+from text_segmentation import plan_chunks
+
+# The reference clip shipped with the f5_tts package, wherever it is installed
+DEFAULT_REF_AUDIO = str(files("f5_tts").joinpath("infer/examples/basic/basic_ref_en.wav"))
+DEFAULT_REF_TEXT = "Some call me nature, others call me mother nature."
+
+SAMPLE_TEXT = (
+    "The old lighthouse stood at the edge of the cliff, its lamp long since dark. "
+    "Every evening, Mr. Hale walked the narrow path up from the village, counting the steps as he went. "
+    "There were three hundred and twelve of them, though on cold nights he was sure there were more. "
+    "He carried a lantern, a flask of tea, and a notebook in which he recorded the ships that passed, "
+    "their names, their flags, and the hour they rounded the point. "
+    "Nobody had asked him to do this; nobody, as far as he knew, ever read what he wrote. "
+    "Still, he kept at it for thirty-one years, until the morning the notebook was found on the top step, "
+    "open to a page that held a single line: the last ship came home."
+)
+
+def benchmark(model, text, target_chars, repeats, ref_audio=DEFAULT_REF_AUDIO, ref_text=DEFAULT_REF_TEXT):
+    """
+    Render `text` split at `target_chars` and return
+    (number of chunks, seconds of compute for the fastest run, seconds of audio).
+    """
+    chunks = plan_chunks(text, target_chars=target_chars, max_chars=target_chars)
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        wavs = [
+            model.infer(ref_file=ref_audio, ref_text=ref_text, gen_text=chunk, show_info=lambda *a: None)[0]
+            for chunk in chunks
+        ]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    duration = len(np.concatenate(wavs)) / model.target_sample_rate
+    return len(chunks), best, duration
+
+# Example usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Real-time factor of F5-TTS against chunk size")
+    parser.add_argument("--text-file", help="Text to synthesize (defaults to a built-in passage)")
+    parser.add_argument("--sizes", default="50,100,150,200,300,500,2000", help="Comma-separated target chunk sizes")
+    parser.add_argument("--repeats", type=int, default=2, help="Runs per size; the fastest is reported")
+    parser.add_argument("--ref-audio", default=DEFAULT_REF_AUDIO, help="Reference clip (defaults to the f5_tts example)")
+    parser.add_argument("--ref-text", default=DEFAULT_REF_TEXT, help="Transcript of the reference clip")
+    args = parser.parse_args()
+
+    text = SAMPLE_TEXT
+    if args.text_file:
+        with open(args.text_file, "r", encoding="utf-8") as f:
+            text = f.read()
+
+    model = F5TTS()
+    # Warm up so the first size doesn't pay for lazy initialization
+    model.infer(ref_file=args.ref_audio, ref_text=args.ref_text, gen_text="Warm up.", show_info=lambda *a: None)
+
+    print(f"{'target_chars':>12} {'chunks':>6} {'compute_s':>9} {'audio_s':>8} {'rtf':>6}")
+    for size in (int(size) for size in args.sizes.split(",")):
+        chunk_count, elapsed, duration = benchmark(model, text, size, args.repeats, args.ref_audio, args.ref_text)
+        print(f"{size:>12} {chunk_count:>6} {elapsed:>9.2f} {duration:>8.2f} {elapsed / duration:>6.3f}")
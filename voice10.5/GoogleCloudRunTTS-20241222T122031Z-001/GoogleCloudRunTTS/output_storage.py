@@ -0,0 +1,140 @@
+"""
+Bounded storage for generated audio files.
+
+Files live in subdirectories named by a hash prefix of the filename, so no
+directory grows without limit and a name maps to exactly one path. The store
+keeps every file's size and last-served time in memory, serves lookups from
+that index, and deletes files that go unserved for the TTL or, while the total
+is over budget, the least recently served ones.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+class OutputStore:
+    """
+    Generated files under OUTPUT_DIR, kept in hash-sharded subdirectories.
+
+    An in-memory index records every file's size and when it was last served,
+    so lookups never list the directory. A janitor removes files not served
+    within the TTL and, while the total is over the byte budget, the least
+    recently served ones.
+    """
+
+    def __init__(self, root: str, max_bytes: int, ttl_seconds: int, shard_chars: int = 2,
+                 on_remove: Optional[Callable[[str], None]] = None):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.shard_chars = shard_chars
+        # Called with the path of every file the store deletes
+        self.on_remove = on_remove
+        # filename -> (size, last served), least recently served first
+        self.files: "OrderedDict[str, tuple]" = OrderedDict()
+        self.total_bytes = 0
+        self.counters = {"evicted": 0, "expired": 0, "evicted_bytes": 0}
+        self.lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._load_index()
+
+    def path_for(self, filename: str) -> str:
+        if os.path.basename(filename) != filename or filename.startswith("."):
+            raise ValueError(f"Invalid output filename: {filename}")
+        shard = hashlib.sha1(filename.encode("utf-8")).hexdigest()[:self.shard_chars]
+        directory = os.path.join(self.root, shard)
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, filename)
+
+    def _load_index(self):
+        # Files from the old flat layout are moved into their shards first
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if os.path.isfile(path):
+                os.replace(path, self.path_for(name))
+        # Then one walk at startup; after this the directory is never listed
+        paths = [
+            os.path.join(directory, name)
+            for directory, _, names in os.walk(self.root)
+            for name in names if not name.endswith(".tmp")
+        ]
+        entries = []
+        for path in paths:
+            name = os.path.basename(path)
+            # Anything outside its own shard would be indexed under a path that doesn't exist
+            if path != self.path_for(name):
+                os.replace(path, self.path_for(name))
+                path = self.path_for(name)
+            stat = os.stat(path)
+            entries.append((stat.st_atime, name, stat.st_size))
+        for last_served, name, size in sorted(entries):
+            self.files[name] = (size, last_served)
+            self.total_bytes += size
+        self._evict_over_budget()
+
+    def register(self, filename: str) -> str:
+        """Record a file just written (or rewritten) under path_for(filename)."""
+        path = self.path_for(filename)
+        size = os.path.getsize(path)
+        with self.lock:
+            previous = self.files.pop(filename, None)
+            if previous:
+                self.total_bytes -= previous[0]
+            self.files[filename] = (size, time.time())
+            self.total_bytes += size
+            self._evict_over_budget(keep=filename)
+        return path
+
+    def lookup(self, filename: str) -> Optional[str]:
+        """Path of an indexed file, marking it as just served."""
+        with self.lock:
+            entry = self.files.get(filename)
+            if entry is None:
+                return None
+            self.files[filename] = (entry[0], time.time())
+            self.files.move_to_end(filename)
+        return self.path_for(filename)
+
+    def _remove(self, filename: str):
+        # Callers hold self.lock
+        size, _ = self.files.pop(filename)
+        self.total_bytes -= size
+        self.counters["evicted_bytes"] += size
+        path = self.path_for(filename)
+        if self.on_remove:
+            self.on_remove(path)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _evict_over_budget(self, keep: Optional[str] = None):
+        for filename in list(self.files):
+            if self.total_bytes <= self.max_bytes:
+                break
+            if filename != keep:
+                self._remove(filename)
+                self.counters["evicted"] += 1
+
+    def sweep(self):
+        cutoff = time.time() - self.ttl_seconds
+        with self.lock:
+            for filename, (_, last_served) in list(self.files.items()):
+                if last_served >= cutoff:
+                    # Entries are in last-served order, so the rest are newer
+                    break
+                self._remove(filename)
+                self.counters["expired"] += 1
+            self._evict_over_budget()
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                **self.counters,
+                "files": len(self.files),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+            }
@@ -0,0 +1,20 @@
+"""
+Worker process for rendering podcast segments in parallel.
+
+Kept separate from app.py so spawned workers load only the model, not the
+FastAPI app and its own engine.
+"""
+from f5_tts.api import F5TTS
+import torch
+
+model = None
+
+def init_worker(model_type: str, num_threads: int):
+    global model
+    # Split the cores between workers instead of every worker grabbing all of them
+    torch.set_num_threads(num_threads)
+    model = F5TTS(model_type=model_type)
+
+def render_segment(text: str, ref_audio: str, ref_text: str):
+    wav, sr, _ = model.infer(ref_file=ref_audio, ref_text=ref_text, gen_text=text)
+    return wav
@@ -0,0 +1,59 @@
+import asyncio
+import os
+
+import numpy as np
+import soundfile as sf
+
+import audio_encoding
+from output_storage import OutputStore
+
+def write_wav(store: OutputStore, filename: str) -> str:
+    path = store.path_for(filename)
+    sf.write(path, np.zeros(24000, dtype=np.int16), 24000)
+    store.register(filename)
+    return path
+
+def test_rendition_is_indexed_under_its_own_name(tmp_path):
+    store = OutputStore(str(tmp_path), max_bytes=10**9, ttl_seconds=3600)
+    pool = audio_encoding.EncoderPool(1)
+    source = write_wav(store, "output_x.wav")
+
+    target = store.path_for("output_x.flac")
+    path = asyncio.run(pool.rendition(source, "flac", target))
+    store.register("output_x.flac")
+
+    assert path == target
+    assert store.lookup("output_x.flac") == target
+    assert os.path.exists(store.lookup("output_x.flac"))
+    assert store.stats()["files"] == 2
+
+    # The index rebuilt at startup resolves both files
+    reloaded = OutputStore(str(tmp_path), max_bytes=10**9, ttl_seconds=3600)
+    for filename in ("output_x.wav", "output_x.flac"):
+        assert os.path.exists(reloaded.lookup(filename))
+
+def test_misplaced_files_are_moved_to_their_shard(tmp_path):
+    store = OutputStore(str(tmp_path), max_bytes=10**9, ttl_seconds=3600)
+    source = write_wav(store, "output_x.wav")
+    # A rendition written next to its WAV, in the WAV's shard
+    misplaced = os.path.splitext(source)[0] + ".flac"
+    audio_encoding.transcode_file(source, misplaced, "flac")
+
+    reloaded = OutputStore(str(tmp_path), max_bytes=10**9, ttl_seconds=3600)
+    path = reloaded.lookup("output_x.flac")
+    assert path == reloaded.path_for("output_x.flac")
+    assert os.path.exists(path)
+    assert reloaded.stats()["files"] == 2
+
+def test_eviction_removes_least_recently_served(tmp_path):
+    removed = []
+    store = OutputStore(str(tmp_path), max_bytes=10**9, ttl_seconds=3600, on_remove=removed.append)
+    first = write_wav(store, "output_a.wav")
+    write_wav(store, "output_b.wav")
+    store.max_bytes = os.path.getsize(first)
+    write_wav(store, "output_c.wav")
+
+    assert store.lookup("output_a.wav") is None
+    assert store.lookup("output_b.wav") is None
+    assert os.path.exists(store.lookup("output_c.wav"))
+    assert removed == [first, store.path_for("output_b.wav")]
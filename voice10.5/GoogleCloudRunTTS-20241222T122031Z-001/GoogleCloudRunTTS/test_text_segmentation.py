@@ -0,0 +1,15 @@
+from text_segmentation import plan_chunks, split_sentences
+
+def test_everyday_words_end_sentences():
+    assert split_sentences("He said no. Then I left.") == ["He said no.", "Then I left."]
+    assert split_sentences("We sat in the sun. It was warm.") == ["We sat in the sun.", "It was warm."]
+
+def test_abbreviations_do_not_end_sentences():
+    assert split_sentences("Mr. Hale walked up. Co. Kerry is west.") == ["Mr. Hale walked up.", "Co. Kerry is west."]
+    assert split_sentences("See No. 5 below. Done.") == ["See No. 5 below.", "Done."]
+
+def test_chunks_keep_whole_sentences():
+    text = " ".join(f"Sentence number {i} is here." for i in range(20))
+    chunks = plan_chunks(text, target_chars=60, max_chars=60)
+    assert " ".join(chunks) == text
+    assert all(chunk.endswith(".") and len(chunk) <= 60 for chunk in chunks)
@@ -0,0 +1,129 @@
+"""
+Compressed output formats for generated audio.
+
+Audio is rendered as 16-bit PCM and encoded on request to FLAC, Opus or MP3
+through libsndfile. Speech compresses roughly 10x as Opus or MP3 with no
+audible loss, so encoded renditions are what should be stored and served.
+Encoding runs on a small shared thread pool (libsndfile releases the GIL),
+and concurrent requests for the same rendition share one encode.
+"""
+import asyncio
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, NamedTuple, Optional
+
+import numpy as np
+import soundfile as sf
+
+class AudioFormat(NamedTuple):
+    media_type: str
+    extension: str
+    container: str
+    subtype: str
+
+FORMATS: Dict[str, AudioFormat] = {
+    "wav": AudioFormat("audio/wav", ".wav", "WAV", "PCM_16"),
+    "flac": AudioFormat("audio/flac", ".flac", "FLAC", "PCM_16"),
+    "opus": AudioFormat("audio/ogg; codecs=opus", ".opus", "OGG", "OPUS"),
+    "mp3": AudioFormat("audio/mpeg", ".mp3", "MP3", "MPEG_LAYER_III"),
+}
+
+# Media types clients send in Accept, by the format that satisfies them
+MEDIA_TYPES = {
+    "audio/wav": "wav", "audio/wave": "wav", "audio/x-wav": "wav", "audio/vnd.wave": "wav",
+    "audio/flac": "flac", "audio/x-flac": "flac",
+    "audio/ogg": "opus", "audio/opus": "opus",
+    "audio/mpeg": "mp3", "audio/mp3": "mp3",
+}
+
+# Opus only encodes at these rates
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+def negotiate(accept: Optional[str], default: str = "wav") -> Optional[str]:
+    """
+    Pick the format for an Accept header: the highest q-value wins, ties go to
+    the earlier entry, and wildcards get `default`. Returns None when nothing
+    acceptable can be produced.
+    """
+    if not accept:
+        return default
+    choices = []
+    for position, entry in enumerate(accept.split(",")):
+        media_type, *params = [part.strip() for part in entry.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        media_type = media_type.lower()
+        format = default if media_type in ("*/*", "audio/*") else MEDIA_TYPES.get(media_type)
+        if format and quality > 0:
+            choices.append((-quality, position, format))
+    return min(choices)[2] if choices else None
+
+def encode(samples: np.ndarray, sample_rate: int, format: str) -> bytes:
+    """Encode int16 or float samples, shaped (samples,) or (samples, channels)."""
+    audio_format = FORMATS[format]
+    if format == "opus" and sample_rate not in OPUS_SAMPLE_RATES:
+        target_rate = min(rate for rate in OPUS_SAMPLE_RATES if rate >= sample_rate) if sample_rate <= 48000 else 48000
+        samples, sample_rate = resample(samples, sample_rate, target_rate), target_rate
+    buffer = io.BytesIO()
+    sf.write(buffer, samples, sample_rate, format=audio_format.container, subtype=audio_format.subtype)
+    return buffer.getvalue()
+
+def resample(samples: np.ndarray, sample_rate: int, target_rate: int) -> np.ndarray:
+    if samples.dtype.kind != "f":
+        samples = samples.astype(np.float32) / 32768
+    positions = np.arange(int(len(samples) * target_rate / sample_rate)) * (sample_rate / target_rate)
+    indices = np.arange(len(samples))
+    if samples.ndim == 1:
+        return np.interp(positions, indices, samples).astype(np.float32)
+    return np.stack([np.interp(positions, indices, channel) for channel in samples.T], axis=1).astype(np.float32)
+
+def transcode_file(source_path: str, target_path: str, format: str):
+    """Write an encoded rendition of an audio file, atomically."""
+    samples, sample_rate = sf.read(source_path, dtype="int16")
+    data = encode(samples, sample_rate, format)
+    temp_path = f"{target_path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, target_path)
+
+class EncoderPool:
+    """Shared worker threads for encoding, with in-flight encodes deduplicated by key."""
+
+    def __init__(self, workers: int):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="encoder")
+        self.in_flight: Dict[str, asyncio.Future] = {}
+        self.counters = {"encodes": 0, "joined": 0}
+
+    async def run(self, key: str, function, *args):
+        future = self.in_flight.get(key)
+        if future is not None:
+            self.counters["joined"] += 1
+            return await asyncio.shield(future)
+        future = asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+        self.in_flight[key] = future
+        self.counters["encodes"] += 1
+        try:
+            return await asyncio.shield(future)
+        finally:
+            if self.in_flight.get(key) is future:
+                del self.in_flight[key]
+
+    async def rendition(self, source_path: str, format: str, target_path: Optional[str] = None) -> str:
+        """
+        Path of the `format` rendition of `source_path`, encoding it if missing or
+        stale. It is kept at `target_path`, by default next to the source.
+        """
+        target_path = target_path or os.path.splitext(source_path)[0] + FORMATS[format].extension
+        if os.path.exists(target_path) and os.path.getmtime(target_path) >= os.path.getmtime(source_path):
+            return target_path
+        await self.run(target_path, transcode_file, source_path, target_path, format)
+        return target_path
+
+    def stats(self) -> dict:
+        return {**self.counters, "in_flight": len(self.in_flight)}
@@ -1,5 +1,6 @@
-from fastapi import FastAPI, HTTPException, Depends, UploadFile, WebSocket, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, UploadFile, WebSocket, BackgroundTasks, Request, Response, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, HttpUrl
 from typing import Optional, Dict, List, Union
@@ -14,16 +15,35 @@ from pathlib import Path
 import tempfile
 import wave
 import json
+import struct
+import hashlib
+import threading
+import bisect
+import base64
+import unicodedata
+import uuid
+import random
+import weakref
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
 from datetime import datetime
 # from f5_tts.infer.cli import TTSInference
 # from f5_tts.socket_server import RealTimeInference
 # from f5_tts.infer.speech_edit import SpeechEditor
 import httpx
+from jose import jwt
 # from f5_tts import F5TTS
 # from f5_tts import E2TTS    
 from F5TTS import TTSInference
 from F5TTS import RealTimeInference
 from F5TTS import SpeechEditor
+from f5_tts.infer import utils_infer
+from f5_tts.infer.utils_infer import preprocess_ref_audio_text
+from text_segmentation import plan_chunks, plan_stream_chunks
+import speech_editing
+import audio_encoding
+import admission
 
 load_dotenv()
 
@@ -39,6 +59,61 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Synthesis cache budgets
+CACHE_DIR = os.getenv("TTS_CACHE_DIR", "tts_cache")
+CACHE_MEMORY_BYTES = int(os.getenv("TTS_CACHE_MEMORY_BYTES", 256 * 1024 * 1024))
+CACHE_DISK_BYTES = int(os.getenv("TTS_CACHE_DISK_BYTES", 2 * 1024 * 1024 * 1024))
+
+# Voice conditioning is prepared on first use and kept in an LRU of this many voices.
+# Pinned voices are prepared at startup and never evicted.
+VOICE_CACHE_SIZE = int(os.getenv("VOICE_CACHE_SIZE", 256))
+VOICE_IDLE_SECONDS = int(os.getenv("VOICE_IDLE_SECONDS", 30 * 60))
+PINNED_VOICES = [voice_id for voice_id in os.getenv("PINNED_VOICES", "default").split(",") if voice_id]
+
+# Voice configs are indexed in memory and rescanned for changes in the background
+VOICE_CONFIG_DIR = Path(os.getenv("VOICE_CONFIG_DIR", "voice_configs"))
+CATALOG_REFRESH_SECONDS = float(os.getenv("CATALOG_REFRESH_SECONDS", 5))
+VOICE_PAGE_SIZE = int(os.getenv("VOICE_PAGE_SIZE", 100))
+VOICE_PAGE_MAX = int(os.getenv("VOICE_PAGE_MAX", 1000))
+
+# Access tokens are verified locally; verified users are cached briefly per token
+AUTH_AUDIENCE = os.getenv("AUTH_AUDIENCE", "authenticated")
+AUTH_CACHE_SECONDS = float(os.getenv("AUTH_CACHE_SECONDS", 60))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", 10000))
+JWKS_REFRESH_SECONDS = float(os.getenv("JWKS_REFRESH_SECONDS", 30))
+
+# Webhook delivery: shared pool, per-endpoint concurrency and a durable retry queue
+WEBHOOK_QUEUE_DIR = os.getenv("WEBHOOK_QUEUE_DIR", "webhook_queue")
+WEBHOOK_TIMEOUT = float(os.getenv("WEBHOOK_TIMEOUT", 10))
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", 100))
+WEBHOOK_ENDPOINT_CONCURRENCY = int(os.getenv("WEBHOOK_ENDPOINT_CONCURRENCY", 4))
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", 8))
+WEBHOOK_BACKOFF_SECONDS = float(os.getenv("WEBHOOK_BACKOFF_SECONDS", 1))
+WEBHOOK_MAX_BACKOFF_SECONDS = float(os.getenv("WEBHOOK_MAX_BACKOFF_SECONDS", 300))
+WEBHOOK_BATCH_WINDOW_MS = float(os.getenv("WEBHOOK_BATCH_WINDOW_MS", 1000))
+WEBHOOK_BATCH_MAX_SIZE = int(os.getenv("WEBHOOK_BATCH_MAX_SIZE", 50))
+
+# Audio storage: "supabase" or "local" (a directory stand-in for tests and development)
+AUDIO_STORE = os.getenv("AUDIO_STORE", "supabase")
+AUDIO_BUCKET = os.getenv("AUDIO_BUCKET", "audio")
+LOCAL_AUDIO_STORE_DIR = os.getenv("LOCAL_AUDIO_STORE_DIR", "audio_store")
+LOCAL_AUDIO_STORE_URL = os.getenv("LOCAL_AUDIO_STORE_URL", "file://" + os.path.abspath(LOCAL_AUDIO_STORE_DIR))
+# Supabase's resumable uploads take 6MB parts
+UPLOAD_PART_BYTES = int(os.getenv("UPLOAD_PART_BYTES", 6 * 1024 * 1024))
+UPLOAD_MAX_CONNECTIONS = int(os.getenv("UPLOAD_MAX_CONNECTIONS", 32))
+UPLOAD_TIMEOUT = float(os.getenv("UPLOAD_TIMEOUT", 60))
+
+# Threads encoding FLAC/Opus/MP3 renditions
+ENCODER_WORKERS = int(os.getenv("ENCODER_WORKERS", 2))
+
+# Synthesis is refused with 429 once the estimated wait passes ADMISSION_MAX_WAIT_SECONDS
+# or ADMISSION_MAX_QUEUE requests are in flight. The estimate assumes this process has the
+# instance's CPU to itself, so run a single server worker (WEB_CONCURRENCY=1, as the Dockerfile does)
+ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", 30))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", 64))
+# Starting real-time factor until throughput has been measured
+ADMISSION_INITIAL_RTF = float(os.getenv("ADMISSION_INITIAL_RTF", 1.0))
+
 # Initialize Supabase
 supabase: Client = create_client(
     os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_SERVICE_KEY")
@@ -49,6 +124,8 @@ class WebhookConfig(BaseModel):
     url: HttpUrl
     events: List[str]
     is_active: bool = True
+    # Deliver events collected over a short window as one {"events": [...]} POST
+    batch_events: bool = False
 
 class VoiceConfig(BaseModel):
     name: str
@@ -66,92 +143,1381 @@ class TTSRequest(BaseModel):
     speed: float = 1.0
     pitch: float = 1.0
     energy: float = 1.0
+    # wav, flac, opus or mp3; when unset, taken from an audio type in Accept
+    format: Optional[str] = None
+
+class EditOperation(BaseModel):
+    type: str  # trim, gain, speed, splice or replace
+    start: Optional[float] = None
+    end: Optional[float] = None
+    at: Optional[float] = None
+    gain_db: Optional[float] = None
+    rate: Optional[float] = None
+    # Storage path of the clip a splice or replace inserts
+    audio_url: Optional[str] = None
+    # resynthesize: the new words, and optionally a voice instead of the surrounding audio
+    text: Optional[str] = None
+    voice_id: Optional[str] = None
+    context: Optional[float] = None
+    crossfade: Optional[float] = None
 
 class SpeechEditRequest(BaseModel):
     audio_url: str
-    edit_type: str
-    parameters: Dict[str, float]
+    edit_type: Optional[str] = None
+    parameters: Dict[str, float] = {}
     segments: Optional[List[Dict[str, Union[float, str]]]] = None
+    # Applied in order in one pass; takes the place of edit_type
+    operations: Optional[List[EditOperation]] = None
+
+class AuthenticatedUser:
+    """The caller, as described by the claims of their access token."""
+
+    def __init__(self, id: str, email: Optional[str] = None, role: Optional[str] = None, claims: Optional[dict] = None):
+        self.id = id
+        self.email = email
+        self.role = role
+        self.claims = claims or {}
+
+class TokenVerifier:
+    """
+    Verifies Supabase access tokens without a round trip to the auth server.
+
+    HS256 tokens are checked against the project's JWT secret and asymmetric
+    tokens against the project's JWKS, fetched once and refetched when a token
+    names an unknown key. Verified users are cached by token for a short TTL
+    that never outlives the token. Tokens that cannot be checked locally (no
+    secret configured, a key we cannot find) fall back to supabase.auth.get_user.
+    """
+
+    def __init__(self, jwt_secret: Optional[str], jwks_url: Optional[str], audience: str,
+                 cache_seconds: float, cache_size: int, jwks_refresh_seconds: float):
+        self.jwt_secret = jwt_secret
+        self.jwks_url = jwks_url
+        self.audience = audience
+        self.cache_seconds = cache_seconds
+        self.cache_size = cache_size
+        self.jwks_refresh_seconds = jwks_refresh_seconds
+        self.keys: Dict[str, dict] = {}
+        self.keys_fetched_at = 0.0
+        self.keys_lock = asyncio.Lock()
+        self.cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self.counters = {"cached": 0, "local": 0, "remote": 0, "rejected": 0, "jwks_fetches": 0}
+
+    async def verify(self, token: str) -> AuthenticatedUser:
+        cache_key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            user, expires_at = cached
+            if expires_at > time.time():
+                self.cache.move_to_end(cache_key)
+                self.counters["cached"] += 1
+                return user
+            del self.cache[cache_key]
+
+        try:
+            key, algorithm = await self.signing_key(token)
+            if key is None:
+                user, expires_at = await self.verify_remote(token), time.time() + self.cache_seconds
+                self.counters["remote"] += 1
+            else:
+                claims = jwt.decode(token, key, algorithms=[algorithm], audience=self.audience)
+                user = AuthenticatedUser(
+                    id=claims["sub"], email=claims.get("email"), role=claims.get("role"), claims=claims
+                )
+                expires_at = min(time.time() + self.cache_seconds, claims.get("exp", float("inf")))
+                self.counters["local"] += 1
+        except Exception:
+            self.counters["rejected"] += 1
+            raise
+
+        self.cache[cache_key] = (user, expires_at)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return user
+
+    async def signing_key(self, token: str):
+        # Returns (key, algorithm), or (None, None) when the token must be checked remotely
+        header = jwt.get_unverified_header(token)
+        algorithm = header.get("alg")
+        if algorithm == "HS256":
+            return (self.jwt_secret, algorithm) if self.jwt_secret else (None, None)
+        if not self.jwks_url or algorithm not in ("RS256", "ES256"):
+            return None, None
+        kid = header.get("kid")
+        if kid not in self.keys:
+            # An unknown kid usually means the keys were rotated
+            await self.refresh_keys()
+        key = self.keys.get(kid)
+        return (key, algorithm) if key is not None else (None, None)
+
+    async def refresh_keys(self):
+        async with self.keys_lock:
+            # Don't let a stream of bad kids hammer the JWKS endpoint
+            if time.time() - self.keys_fetched_at < self.jwks_refresh_seconds:
+                return
+            self.keys_fetched_at = time.time()
+            try:
+                async with httpx.AsyncClient(timeout=5.0) as client:
+                    response = await client.get(self.jwks_url)
+                    response.raise_for_status()
+                self.keys = {key["kid"]: key for key in response.json().get("keys", []) if "kid" in key}
+                self.counters["jwks_fetches"] += 1
+            except Exception as e:
+                print(f"Error fetching JWKS: {e}")
+
+    async def verify_remote(self, token: str) -> AuthenticatedUser:
+        # supabase-py is synchronous; keep it off the event loop
+        response = await asyncio.get_running_loop().run_in_executor(None, supabase.auth.get_user, token)
+        user = getattr(response, "user", response)
+        return AuthenticatedUser(id=user.id, email=getattr(user, "email", None), role=getattr(user, "role", None))
+
+    def stats(self) -> dict:
+        return {**self.counters, "cache_entries": len(self.cache), "jwks_keys": len(self.keys)}
+
+token_verifier = TokenVerifier(
+    jwt_secret=os.getenv("SUPABASE_JWT_SECRET"),
+    jwks_url=f"{os.getenv('SUPABASE_URL').rstrip('/')}/auth/v1/.well-known/jwks.json" if os.getenv("SUPABASE_URL") else None,
+    audience=AUTH_AUDIENCE,
+    cache_seconds=AUTH_CACHE_SECONDS,
+    cache_size=AUTH_CACHE_SIZE,
+    jwks_refresh_seconds=JWKS_REFRESH_SECONDS,
+)
 
 # Authentication dependency
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
-        user = supabase.auth.get_user(credentials.credentials)
-        return user
+        return await token_verifier.verify(credentials.credentials)
     except Exception as e:
         raise HTTPException(status_code=401, detail="Invalid authentication")
 
+class SynthesisCache:
+    """
+    Content-addressed cache of rendered WAV bytes.
+
+    Entries are keyed on the normalized text, a fingerprint of the reference voice
+    and every generation parameter. A small in-memory LRU sits in front of an
+    on-disk tier; both are bounded by a byte budget and evict least recently used
+    entries first. Async code uses aget/aput, which answer memory hits inline
+    and do disk reads and writes on the thread pool.
+    """
+
+    def __init__(self, cache_dir: str, max_memory_bytes: int, max_disk_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self.memory_bytes = 0
+        self.disk: "OrderedDict[str, int]" = OrderedDict()
+        self.disk_bytes = 0
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        self.lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_disk_index()
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        return " ".join(unicodedata.normalize("NFC", text).split())
+
+    @classmethod
+    def make_key(cls, text: str, voice: str, **params) -> str:
+        payload = json.dumps(
+            {"text": cls.normalize_text(text), "voice": voice, "params": params},
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.wav")
+
+    def _load_disk_index(self):
+        # Rebuild the disk tier from a previous run, oldest access first
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".wav"):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_atime, name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self.disk[key] = size
+            self.disk_bytes += size
+        self._evict_disk()
+
+    def _evict_memory(self):
+        while self.memory_bytes > self.max_memory_bytes and self.memory:
+            _, data = self.memory.popitem(last=False)
+            self.memory_bytes -= len(data)
+
+    def _evict_disk(self):
+        while self.disk_bytes > self.max_disk_bytes and self.disk:
+            key, size = self.disk.popitem(last=False)
+            self.disk_bytes -= size
+            self.counters["evictions"] += 1
+            try:
+                os.remove(self._disk_path(key))
+            except FileNotFoundError:
+                pass
+
+    def _remember(self, key: str, data: bytes):
+        if len(data) > self.max_memory_bytes:
+            return
+        if key in self.memory:
+            self.memory_bytes -= len(self.memory.pop(key))
+        self.memory[key] = data
+        self.memory_bytes += len(data)
+        self._evict_memory()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self.lock:
+            data = self.memory.get(key)
+            if data is not None:
+                self.memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return data
+            if key in self.disk:
+                try:
+                    with open(self._disk_path(key), "rb") as f:
+                        data = f.read()
+                except FileNotFoundError:
+                    self.disk_bytes -= self.disk.pop(key)
+                else:
+                    self.disk.move_to_end(key)
+                    self.counters["disk_hits"] += 1
+                    self._remember(key, data)
+                    return data
+            self.counters["misses"] += 1
+            return None
+
+    def put(self, key: str, data: bytes):
+        with self.lock:
+            self._remember(key, data)
+            if key in self.disk or len(data) > self.max_disk_bytes:
+                return
+            tmp_path = f"{self._disk_path(key)}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._disk_path(key))
+            self.disk[key] = len(data)
+            self.disk_bytes += len(data)
+            self._evict_disk()
+
+    async def aget(self, key: str) -> Optional[bytes]:
+        with self.lock:
+            data = self.memory.get(key)
+            if data is not None:
+                self.memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return data
+        return await asyncio.get_running_loop().run_in_executor(None, self.get, key)
+
+    async def aput(self, key: str, data: bytes):
+        await asyncio.get_running_loop().run_in_executor(None, self.put, key, data)
+
+    def stats(self) -> dict:
+        with self.lock:
+            hits = self.counters["memory_hits"] + self.counters["disk_hits"]
+            lookups = hits + self.counters["misses"]
+            return {
+                **self.counters,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self.memory),
+                "memory_bytes": self.memory_bytes,
+                "disk_entries": len(self.disk),
+                "disk_bytes": self.disk_bytes,
+            }
+
+_fingerprints: Dict[str, tuple] = {}
+
+def file_fingerprint(path: str) -> str:
+    """Content hash of a reference audio file, memoized on its size and mtime."""
+    stat = os.stat(path)
+    version = (stat.st_size, stat.st_mtime_ns)
+    memo = _fingerprints.get(path)
+    if memo is None or memo[0] != version:
+        with open(path, "rb") as f:
+            memo = (version, hashlib.sha256(f.read()).hexdigest())
+        _fingerprints[path] = memo
+    return memo[1]
+
+class SynthesisQueue:
+    """
+    Runs synthesis requests on the shared model one at a time, in arrival
+    order, off the event loop. f5_tts generates one text per call and the
+    wrapper exposes no batched forward pass, so requests are serialized rather
+    than batched; waiting here rather than on the model lock keeps them from
+    holding thread pool threads, and the wait is measured.
+    """
+
+    def __init__(self, run):
+        self.run = run
+        self.running = asyncio.Semaphore(1)
+        self.waiting = 0
+        self.requests = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    async def submit(self, voice_id: str, text: str, **params):
+        enqueued = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self.running.acquire()
+        finally:
+            self.waiting -= 1
+        try:
+            wait = time.perf_counter() - enqueued
+            self.requests += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            return await asyncio.get_running_loop().run_in_executor(
+                None, lambda: self.run(voice_id, text, **params)
+            )
+        finally:
+            self.running.release()
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "waiting": self.waiting,
+            "avg_queue_wait_ms": 1000 * self.total_wait / self.requests if self.requests else 0.0,
+            "max_queue_wait_ms": 1000 * self.max_wait,
+        }
+
+class VoiceCatalog:
+    """
+    In-memory index of the TOML voice configs.
+
+    Each file is parsed once and parsed again only when its mtime changes, so
+    lookups and searches never touch the filesystem. A voice also counts as
+    changed when its reference clip is replaced (size or mtime), since the
+    conditioning and fingerprints derived from it are then stale. Voices are kept in voice_id
+    order alongside a sorted posting list per filterable value (an inverted
+    index for style tags), all updated incrementally as files change. Pages are
+    served by walking the shortest matching posting list from the cursor.
+    """
+
+    INDEXED_FIELDS = ("language", "gender", "accent", "style_tags")
+
+    def __init__(self, config_dir: Path):
+        self.config_dir = config_dir
+        self.configs: Dict[str, dict] = {}
+        self.mtimes: Dict[str, int] = {}
+        # (size, mtime) of each voice's ref_audio when it was last seen
+        self.ref_versions: Dict[str, Optional[tuple]] = {}
+        self.entries: Dict[str, dict] = {}
+        self.order: List[str] = []
+        self.indexes: Dict[str, Dict[str, List[str]]] = {field: {} for field in self.INDEXED_FIELDS}
+        # XOR of per-voice digests, so the version is updated in O(1) per change
+        self.digest = 0
+        self.lock = threading.Lock()
+        self.listeners = []
+        self.refresh()
+
+    def __contains__(self, voice_id: str) -> bool:
+        return voice_id in self.configs
+
+    def __len__(self) -> int:
+        return len(self.configs)
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.digest:032x}"'
+
+    def get(self, voice_id: str) -> Optional[dict]:
+        return self.configs.get(voice_id)
+
+    def on_change(self, listener):
+        # listener(voice_id) is called for every added, edited or removed voice
+        self.listeners.append(listener)
+
+    @staticmethod
+    def file_version(path: Optional[str]) -> Optional[tuple]:
+        try:
+            stat = os.stat(path)
+        except (OSError, TypeError):
+            return None
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def refresh(self) -> bool:
+        # Only stat the directory and the reference clips; configs are read when their mtime moved
+        seen: Dict[str, tuple] = {}
+        if self.config_dir.exists():
+            for entry in os.scandir(self.config_dir):
+                if entry.name.endswith(".toml") and entry.is_file():
+                    seen[entry.name[:-len(".toml")]] = (entry.path, entry.stat().st_mtime_ns)
+
+        changed = []
+        for voice_id, (path, mtime) in seen.items():
+            if self.mtimes.get(voice_id) == mtime:
+                if voice_id in self.configs:
+                    ref_version = self.file_version(self.configs[voice_id].get("ref_audio"))
+                    if self.ref_versions.get(voice_id) != ref_version:
+                        self.ref_versions[voice_id] = ref_version
+                        changed.append(voice_id)
+                continue
+            self.mtimes[voice_id] = mtime
+            try:
+                with open(path, "rb") as f:
+                    config = tomli.load(f)
+            except Exception as e:
+                # Keep serving the last good version until the file is fixed
+                print(f"Error loading voice config {path}: {e}")
+                continue
+            with self.lock:
+                self._unindex(voice_id)
+                self._index(voice_id, config)
+            self.ref_versions[voice_id] = self.file_version(config.get("ref_audio"))
+            changed.append(voice_id)
+        for voice_id in list(self.mtimes):
+            if voice_id not in seen:
+                self.mtimes.pop(voice_id)
+                self.ref_versions.pop(voice_id, None)
+                if voice_id in self.configs:
+                    with self.lock:
+                        self._unindex(voice_id)
+                    changed.append(voice_id)
+
+        for listener in self.listeners:
+            for voice_id in changed:
+                listener(voice_id)
+        return bool(changed)
+
+    @staticmethod
+    def index_values(field: str, entry: dict) -> List[str]:
+        values = entry.get(field)
+        if values is None:
+            return []
+        if not isinstance(values, list):
+            values = [values]
+        return sorted({str(value).strip().lower() for value in values})
+
+    @staticmethod
+    def entry_digest(voice_id: str, entry: dict) -> int:
+        payload = json.dumps([voice_id, entry], sort_keys=True).encode("utf-8")
+        return int.from_bytes(hashlib.sha256(payload).digest()[:16], "big")
+
+    def _index(self, voice_id: str, config: dict):
+        # Callers hold self.lock
+        voice_config = VoiceConfig(
+            name=config.get("name", voice_id),
+            language=config.get("language", "en"),
+            gender=config.get("gender", "unknown"),
+            accent=config.get("accent"),
+            style_tags=config.get("style_tags", []),
+            description=config.get("description")
+        )
+        entry = {"voice_id": voice_id, **voice_config.dict()}
+        self.configs[voice_id] = config
+        self.entries[voice_id] = entry
+        bisect.insort(self.order, voice_id)
+        for field in self.INDEXED_FIELDS:
+            for value in self.index_values(field, entry):
+                bisect.insort(self.indexes[field].setdefault(value, []), voice_id)
+        self.digest ^= self.entry_digest(voice_id, entry)
+
+    def _unindex(self, voice_id: str):
+        # Callers hold self.lock
+        entry = self.entries.pop(voice_id, None)
+        self.configs.pop(voice_id, None)
+        if entry is None:
+            return
+        del self.order[bisect.bisect_left(self.order, voice_id)]
+        for field in self.INDEXED_FIELDS:
+            index = self.indexes[field]
+            for value in self.index_values(field, entry):
+                postings = index[value]
+                del postings[bisect.bisect_left(postings, voice_id)]
+                if not postings:
+                    del index[value]
+        self.digest ^= self.entry_digest(voice_id, entry)
+
+    def search(self, filters: Dict[str, List[str]], after: Optional[str] = None, limit: int = 100):
+        """
+        Return up to `limit` voices after the voice_id `after` matching every
+        filter value, and the voice_id to continue from (None on the last page).
+        """
+        with self.lock:
+            postings = [self.order]
+            for field, values in filters.items():
+                for value in values:
+                    postings.append(self.indexes[field].get(value.strip().lower(), []))
+            if len(postings) > 1:
+                postings = postings[1:]
+            postings.sort(key=len)
+            driver, others = postings[0], postings[1:]
+
+            page = []
+            position = bisect.bisect_right(driver, after) if after is not None else 0
+            while position < len(driver) and len(page) <= limit:
+                voice_id = driver[position]
+                position += 1
+                if all(self._contains(other, voice_id) for other in others):
+                    page.append(self.entries[voice_id])
+        if len(page) > limit:
+            return page[:limit], page[limit - 1]["voice_id"]
+        return page, None
+
+    @staticmethod
+    def _contains(postings: List[str], voice_id: str) -> bool:
+        position = bisect.bisect_left(postings, voice_id)
+        return position < len(postings) and postings[position] == voice_id
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    # Weak comparison, as If-None-Match requires
+    return "*" in candidates or etag in [candidate.removeprefix("W/") for candidate in candidates]
+
+voice_catalog = VoiceCatalog(VOICE_CONFIG_DIR)
+
+class WebhookDispatcher:
+    """
+    Delivers webhook events in the background over one shared connection pool.
+
+    Every delivery is written to WEBHOOK_QUEUE_DIR before it is attempted and
+    removed once the endpoint accepts it, so pending deliveries survive a
+    restart. Server workers share the queue, so each one keeps its records in
+    its own inflight/<pid> folder and, on startup, takes over those left by
+    workers that are gone by moving them into it; the move succeeds for only
+    one worker, so a record is never delivered twice. Deliveries run concurrently, at most `endpoint_concurrency` at a
+    time per endpoint, and failures are retried with exponential backoff until
+    `max_attempts`, after which the record is moved to the dead-letter folder.
+    Endpoints that opt into batching get their events in one POST per window.
+    """
+
+    def __init__(self, queue_dir: str, timeout: float, max_connections: int, endpoint_concurrency: int,
+                 max_attempts: int, backoff_seconds: float, max_backoff_seconds: float,
+                 batch_window_ms: float, batch_max_size: int):
+        self.queue_dir = queue_dir
+        self.dead_dir = os.path.join(queue_dir, "dead")
+        self.inflight_dir = os.path.join(queue_dir, "inflight")
+        # This worker's folder, set on start()
+        self.claim_dir: Optional[str] = None
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.endpoint_concurrency = endpoint_concurrency
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.batch_window = batch_window_ms / 1000
+        self.batch_max_size = batch_max_size
+        self.client: Optional[httpx.AsyncClient] = None
+        self.endpoint_limits: Dict[str, asyncio.Semaphore] = {}
+        self.batches: Dict[str, dict] = {}
+        self.tasks = set()
+        self.counters = {"enqueued": 0, "delivered": 0, "retries": 0, "dead": 0}
+        os.makedirs(self.dead_dir, exist_ok=True)
+        os.makedirs(self.inflight_dir, exist_ok=True)
+
+    async def start(self):
+        self.client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+        )
+        self.claim_dir = os.path.join(self.inflight_dir, str(os.getpid()))
+        os.makedirs(self.claim_dir, exist_ok=True)
+        # Claim what stopped workers left queued, then resume it
+        for directory in self._orphaned_dirs():
+            for name in os.listdir(directory):
+                if name.endswith(".json"):
+                    try:
+                        os.replace(os.path.join(directory, name), os.path.join(self.claim_dir, name))
+                    except FileNotFoundError:
+                        # Another worker claimed it first
+                        pass
+            if directory != self.queue_dir:
+                try:
+                    os.rmdir(directory)
+                except OSError:
+                    pass
+        for name in sorted(os.listdir(self.claim_dir)):
+            if name.endswith(".json"):
+                try:
+                    with open(os.path.join(self.claim_dir, name)) as f:
+                        self._spawn(json.load(f))
+                except Exception as e:
+                    print(f"Error loading queued webhook {name}: {e}")
+
+    def _orphaned_dirs(self) -> List[str]:
+        # Records queued before per-worker folders, and the folders of workers that are gone
+        dirs = [self.queue_dir]
+        for name in os.listdir(self.inflight_dir):
+            path = os.path.join(self.inflight_dir, name)
+            if name.isdigit() and path != self.claim_dir and not self._alive(int(name)):
+                dirs.append(path)
+        return dirs
+
+    @staticmethod
+    def _alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    async def stop(self):
+        for batch in list(self.batches.values()):
+            batch["timer"].cancel()
+        for url in list(self.batches):
+            self._flush(url)
+        for task in list(self.tasks):
+            task.cancel()
+        if self.client is not None:
+            await self.client.aclose()
+
+    def enqueue(self, url: str, payload: dict, batch: bool = False):
+        self.counters["enqueued"] += 1
+        if not batch:
+            self._spawn(self._record(url, payload))
+            return
+        pending = self.batches.get(url)
+        if pending is None:
+            pending = {"events": [], "timer": asyncio.get_running_loop().call_later(self.batch_window, self._flush, url)}
+            self.batches[url] = pending
+        pending["events"].append(payload)
+        if len(pending["events"]) >= self.batch_max_size:
+            self._flush(url)
+
+    def _flush(self, url: str):
+        pending = self.batches.pop(url, None)
+        if pending is None:
+            return
+        pending["timer"].cancel()
+        self._spawn(self._record(url, {"events": pending["events"]}))
+
+    def _record(self, url: str, payload: dict) -> dict:
+        record = {"id": uuid.uuid4().hex, "url": url, "payload": payload, "attempts": 0, "next_attempt": time.time()}
+        self._persist(record)
+        return record
+
+    def _path(self, record: dict) -> str:
+        return os.path.join(self.claim_dir, f"{record['id']}.json")
+
+    def _persist(self, record: dict):
+        # Write then rename so a crash never leaves a half-written record
+        path = self._path(record)
+        with open(path + ".tmp", "w") as f:
+            json.dump(record, f)
+        os.replace(path + ".tmp", path)
+
+    def _spawn(self, record: dict):
+        task = asyncio.ensure_future(self._deliver(record))
+        # Keep a reference so the task isn't garbage collected
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _deliver(self, record: dict):
+        limit = self.endpoint_limits.setdefault(record["url"], asyncio.Semaphore(self.endpoint_concurrency))
+        while True:
+            delay = record["next_attempt"] - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            retry = True
+            try:
+                async with limit:
+                    response = await self.client.post(record["url"], json=record["payload"])
+            except Exception as e:
+                error = str(e) or type(e).__name__
+            else:
+                if response.status_code < 300:
+                    try:
+                        os.unlink(self._path(record))
+                    except FileNotFoundError:
+                        pass
+                    self.counters["delivered"] += 1
+                    return
+                # Other client errors won't succeed on a retry
+                retry = response.status_code >= 500 or response.status_code in (408, 429)
+                error = f"HTTP {response.status_code}"
+
+            record["attempts"] += 1
+            record["last_error"] = error
+            if not retry or record["attempts"] >= self.max_attempts:
+                print(f"Webhook delivery to {record['url']} failed: {error}")
+                os.replace(self._path(record), os.path.join(self.dead_dir, f"{record['id']}.json"))
+                self.counters["dead"] += 1
+                return
+            backoff = min(self.max_backoff_seconds, self.backoff_seconds * 2 ** (record["attempts"] - 1))
+            # Jitter keeps retries from many deliveries from landing together
+            record["next_attempt"] = time.time() + backoff * (0.5 + random.random() / 2)
+            self._persist(record)
+            self.counters["retries"] += 1
+
+    def stats(self) -> dict:
+        return {
+            **self.counters,
+            "in_flight": len(self.tasks),
+            "batched": sum(len(batch["events"]) for batch in self.batches.values()),
+            "endpoints": len(self.endpoint_limits),
+        }
+
+webhook_dispatcher = WebhookDispatcher(
+    WEBHOOK_QUEUE_DIR,
+    timeout=WEBHOOK_TIMEOUT,
+    max_connections=WEBHOOK_MAX_CONNECTIONS,
+    endpoint_concurrency=WEBHOOK_ENDPOINT_CONCURRENCY,
+    max_attempts=WEBHOOK_MAX_ATTEMPTS,
+    backoff_seconds=WEBHOOK_BACKOFF_SECONDS,
+    max_backoff_seconds=WEBHOOK_MAX_BACKOFF_SECONDS,
+    batch_window_ms=WEBHOOK_BATCH_WINDOW_MS,
+    batch_max_size=WEBHOOK_BATCH_MAX_SIZE,
+)
+
+# NumPy dtype for each PCM sample width; 8-bit WAV is unsigned
+SAMPLE_DTYPES = {1: np.uint8, 2: np.int16, 4: np.int32}
+# WAV format tags; EXTENSIBLE carries the real one at the start of its sub-format GUID
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+class AudioBuffer:
+    """
+    Decoded audio held in memory: raw little-endian PCM plus its format.
+
+    The PCM is a memoryview over the bytes it came from, so parsing a WAV,
+    slicing, the NumPy view in `samples` and streaming it out don't copy.
+    Audio moves from synthesis through the cache to the response or upload
+    as one of these rather than as a file path.
+    """
+
+    def __init__(self, pcm, sample_rate: int, channels: int = 1, sample_width: int = 2):
+        self.pcm = memoryview(pcm).cast("B")
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_width = sample_width
+        # Synthesis cache key, when the audio came from (or went into) the cache
+        self.cache_key: Optional[str] = None
+        # Served from the cache rather than rendered
+        self.cached = False
+
+    @classmethod
+    def from_wav(cls, data) -> "AudioBuffer":
+        # Walk the RIFF chunks and keep a view of the data chunk
+        view = memoryview(data).cast("B")
+        if bytes(view[0:4]) != b"RIFF" or bytes(view[8:12]) != b"WAVE":
+            raise ValueError("Not a WAV file")
+        offset, fmt = 12, None
+        while offset + 8 <= len(view):
+            chunk_id, size = struct.unpack_from("<4sI", view, offset)
+            offset += 8
+            if chunk_id == b"fmt ":
+                tag, channels, sample_rate, _, _, bits = struct.unpack_from("<HHIIHH", view, offset)
+                if tag == WAVE_FORMAT_EXTENSIBLE and size >= 40:
+                    tag, = struct.unpack_from("<H", view, offset + 24)
+                fmt = (tag, sample_rate, channels, bits // 8)
+            elif chunk_id == b"data":
+                if fmt is None:
+                    raise ValueError("WAV data before its fmt chunk")
+                # Streamed WAVs leave the size at its maximum
+                return cls.from_wav_data(view[offset:min(offset + size, len(view))], *fmt)
+            offset += size + (size & 1)
+        raise ValueError("WAV file has no data chunk")
+
+    @classmethod
+    def from_wav_data(cls, pcm: memoryview, tag: int, sample_rate: int, channels: int, width: int) -> "AudioBuffer":
+        # 8/16/32-bit PCM is kept as is; other encodings are converted once here
+        if tag == WAVE_FORMAT_PCM and width in SAMPLE_DTYPES:
+            return cls(pcm, sample_rate, channels, width)
+        if not channels or not width:
+            raise ValueError("WAV fmt chunk has no channels or sample width")
+        pcm = pcm[:len(pcm) - len(pcm) % (channels * width)]
+        if tag == WAVE_FORMAT_PCM and width == 3:
+            # Widen 24-bit samples to 32-bit by putting them in the top three bytes
+            wide = np.zeros((len(pcm) // 3, 4), dtype=np.uint8)
+            wide[:, 1:] = np.frombuffer(pcm, dtype=np.uint8).reshape(-1, 3)
+            return cls(wide.data, sample_rate, channels, 4)
+        if tag == WAVE_FORMAT_IEEE_FLOAT and width in (4, 8):
+            samples = np.frombuffer(pcm, dtype=f"<f{width}")
+            if channels > 1:
+                samples = samples.reshape(-1, channels)
+            return cls.from_samples(samples, sample_rate)
+        raise ValueError(f"Unsupported WAV encoding: format tag {tag:#06x}, {width * 8}-bit")
+
+    @classmethod
+    def from_samples(cls, samples: np.ndarray, sample_rate: int) -> "AudioBuffer":
+        # Float audio in [-1, 1] is stored as 16-bit PCM
+        if samples.dtype.kind == "f":
+            samples = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+        channels = samples.shape[1] if samples.ndim > 1 else 1
+        samples = np.ascontiguousarray(samples)
+        return cls(samples.data, sample_rate, channels, samples.dtype.itemsize)
+
+    @classmethod
+    def from_result(cls, result) -> "AudioBuffer":
+        # Models hand back a WAV path, WAV bytes or (samples, sample_rate)
+        if isinstance(result, cls):
+            return result
+        if isinstance(result, (bytes, bytearray, memoryview)):
+            return cls.from_wav(result)
+        if isinstance(result, tuple):
+            samples, sample_rate = result[:2]
+            return cls.from_samples(np.asarray(samples), sample_rate)
+        with open(result, "rb") as f:
+            data = f.read()
+        os.unlink(result)
+        return cls.from_wav(data)
+
+    @classmethod
+    def concat(cls, buffers: List["AudioBuffer"]) -> "AudioBuffer":
+        first = buffers[0]
+        if len(buffers) == 1:
+            return first
+        return cls(b"".join(buffer.pcm for buffer in buffers), first.sample_rate, first.channels, first.sample_width)
+
+    @property
+    def samples(self) -> np.ndarray:
+        samples = np.frombuffer(self.pcm, dtype=np.dtype(SAMPLE_DTYPES[self.sample_width]).newbyteorder("<"))
+        return samples.reshape(-1, self.channels) if self.channels > 1 else samples
+
+    @property
+    def nbytes(self) -> int:
+        return self.pcm.nbytes
+
+    @property
+    def duration(self) -> float:
+        return self.nbytes / (self.sample_rate * self.channels * self.sample_width)
+
+    @property
+    def wav_size(self) -> int:
+        return 44 + self.nbytes
+
+    def wav_header(self) -> bytes:
+        return struct.pack(
+            "<4sI4s4sIHHIIHH4sI",
+            b"RIFF", 36 + self.nbytes, b"WAVE",
+            b"fmt ", 16, 1, self.channels, self.sample_rate,
+            self.sample_rate * self.channels * self.sample_width, self.channels * self.sample_width,
+            self.sample_width * 8,
+            b"data", self.nbytes
+        )
+
+    def to_float(self) -> np.ndarray:
+        # Samples as float32 in [-1, 1], shaped (samples, channels)
+        samples = self.samples.reshape(-1, self.channels).astype(np.float32)
+        if self.sample_width == 1:
+            return (samples - 128) / 128
+        return samples / float(2 ** (self.sample_width * 8 - 1))
+
+    def wav_bytes(self) -> bytes:
+        return self.wav_header() + self.pcm
+
+    async def iter_wav(self, chunk_size: int = 1024 * 1024):
+        # Header, then views into the PCM; nothing is joined into one body
+        yield self.wav_header()
+        for offset in range(0, self.nbytes, chunk_size):
+            yield self.pcm[offset:offset + chunk_size]
+
+async def iter_file(path: str, chunk_size: int = 1024 * 1024):
+    # Read a file in chunks on the executor so large files don't block the loop
+    loop = asyncio.get_running_loop()
+    with open(path, "rb") as f:
+        while True:
+            chunk = await loop.run_in_executor(None, f.read, chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+async def iter_parts(source, part_size: int):
+    # Re-chunk bytes or an async byte stream into parts of exactly part_size (the last may be short)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source)
+        for offset in range(0, len(view), part_size):
+            yield view[offset:offset + part_size]
+        return
+    buffer = bytearray()
+    async for chunk in source:
+        buffer += chunk
+        while len(buffer) >= part_size:
+            yield bytes(buffer[:part_size])
+            del buffer[:part_size]
+    if buffer:
+        yield bytes(buffer)
+
+class SupabaseAudioStore:
+    """
+    Async uploads to a Supabase Storage bucket over one pooled HTTP client.
+
+    Small objects go up in a single streamed request. Objects larger than
+    `part_size` use the resumable (TUS) endpoint in fixed-size parts, so long
+    audio is never held in one request body and a failed part is retried on
+    its own.
+    """
+
+    def __init__(self, url: str, key: str, bucket: str, part_size: int, max_connections: int, timeout: float):
+        self.url = url.rstrip("/")
+        self.key = key
+        self.bucket = bucket
+        self.part_size = part_size
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            headers={"authorization": f"Bearer {key}", "apikey": key}
+        )
+
+    def public_url(self, path: str) -> str:
+        return f"{self.url}/storage/v1/object/public/{self.bucket}/{path}"
+
+    async def upload(self, path: str, source, content_type: str = "audio/wav", size: Optional[int] = None) -> str:
+        """Upload bytes or an async byte stream and return the object's public URL."""
+        if size is None and isinstance(source, (bytes, bytearray, memoryview)):
+            size = len(source)
+        if size is not None and size > self.part_size:
+            await self._upload_resumable(path, source, content_type, size)
+        else:
+            content = bytes(source) if isinstance(source, memoryview) else source
+            response = await self.client.post(
+                f"{self.url}/storage/v1/object/{self.bucket}/{path}",
+                content=content,
+                headers={"content-type": content_type}
+            )
+            response.raise_for_status()
+        return self.public_url(path)
+
+    async def _upload_resumable(self, path: str, source, content_type: str, size: int):
+        metadata = ",".join(
+            f"{name} {base64.b64encode(value.encode('utf-8')).decode('ascii')}"
+            for name, value in (("bucketName", self.bucket), ("objectName", path), ("contentType", content_type))
+        )
+        response = await self.client.post(
+            f"{self.url}/storage/v1/upload/resumable",
+            headers={"tus-resumable": "1.0.0", "upload-length": str(size), "upload-metadata": metadata}
+        )
+        response.raise_for_status()
+        location = response.headers["location"]
+        offset = 0
+        async for part in iter_parts(source, self.part_size):
+            for attempt in range(3):
+                try:
+                    response = await self.client.patch(location, content=bytes(part), headers={
+                        "tus-resumable": "1.0.0",
+                        "upload-offset": str(offset),
+                        "content-type": "application/offset+octet-stream"
+                    })
+                    response.raise_for_status()
+                    break
+                except httpx.HTTPError:
+                    if attempt == 2:
+                        raise
+                    await asyncio.sleep(0.5 * 2 ** attempt)
+            offset += len(part)
+
+    async def download(self, path: str) -> bytes:
+        response = await self.client.get(f"{self.url}/storage/v1/object/{self.bucket}/{path}")
+        response.raise_for_status()
+        return response.content
+
+    async def close(self):
+        await self.client.aclose()
+
+class LocalAudioStore:
+    """Stand-in for the bucket that keeps objects under a local directory."""
+
+    def __init__(self, root: str, base_url: str):
+        self.root = root
+        self.base_url = base_url.rstrip("/")
+
+    def public_url(self, path: str) -> str:
+        return f"{self.base_url}/{path}"
+
+    def _path(self, path: str) -> str:
+        full_path = os.path.abspath(os.path.join(self.root, path))
+        if not full_path.startswith(os.path.abspath(self.root) + os.sep):
+            raise ValueError(f"Invalid object path: {path}")
+        return full_path
+
+    async def upload(self, path: str, source, content_type: str = "audio/wav", size: Optional[int] = None) -> str:
+        loop = asyncio.get_running_loop()
+        full_path = self._path(path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "wb") as f:
+            async for part in iter_parts(source, 1024 * 1024):
+                await loop.run_in_executor(None, f.write, part)
+        return self.public_url(path)
+
+    async def download(self, path: str) -> bytes:
+        with open(self._path(path), "rb") as f:
+            return await asyncio.get_running_loop().run_in_executor(None, f.read)
+
+    async def close(self):
+        pass
+
+def create_audio_store():
+    if AUDIO_STORE == "local":
+        return LocalAudioStore(LOCAL_AUDIO_STORE_DIR, LOCAL_AUDIO_STORE_URL)
+    return SupabaseAudioStore(
+        os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_SERVICE_KEY"), AUDIO_BUCKET,
+        part_size=UPLOAD_PART_BYTES,
+        max_connections=UPLOAD_MAX_CONNECTIONS,
+        timeout=UPLOAD_TIMEOUT,
+    )
+
+audio_store = create_audio_store()
+encoder_pool = audio_encoding.EncoderPool(ENCODER_WORKERS)
+admission_controller = admission.AdmissionController(
+    ADMISSION_MAX_WAIT_SECONDS, ADMISSION_MAX_QUEUE, ADMISSION_INITIAL_RTF
+)
+if int(os.getenv("WEB_CONCURRENCY", 1)) > 1:
+    print("Warning: each server worker runs its own admission control and model; "
+          "wait estimates are per worker and will be too low with WEB_CONCURRENCY > 1")
+
+def too_busy(e: admission.Overloaded) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=f"Server is busy, estimated wait {e.estimated_wait:.0f}s",
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+async def encode_audio(audio: AudioBuffer, format: str) -> bytes:
+    """
+    Encode audio as `format`. Renditions of cached audio are cached beside it,
+    so repeated requests never encode twice.
+    """
+    rendition_key = None
+    if audio.cache_key:
+        rendition_key = hashlib.sha256(f"{audio.cache_key}:{format}".encode("utf-8")).hexdigest()
+        cached = await tts_manager.synthesis_cache.aget(rendition_key)
+        if cached is not None:
+            return cached
+    data = await encoder_pool.run(
+        rendition_key or uuid.uuid4().hex, audio_encoding.encode, audio.samples, audio.sample_rate, format
+    )
+    if rendition_key:
+        await tts_manager.synthesis_cache.aput(rendition_key, data)
+    return data
+
+# Voice config keys that describe the voice rather than how to generate with it
+VOICE_METADATA_KEYS = {
+    "model", "ref_audio", "ref_text", "name", "language", "gender", "accent", "style_tags", "description"
+}
+
+class VoiceConditioning:
+    """
+    What makes a voice on the shared base model: the path of the preprocessed
+    reference clip, its transcript and the generation defaults from the voice
+    config.
+
+    The model loads the clip from its path on every call, so a record holds no
+    audio. What it saves is preprocessing: clipping the reference and, when the
+    config has no ref_text, transcribing it. That is why the cache is bounded
+    by a number of voices rather than by bytes.
+    """
+
+    def __init__(self, ref_audio: Optional[str], ref_text: Optional[str], options: dict):
+        self.ref_audio = ref_audio
+        self.ref_text = ref_text
+        self.options = options
+
+    def generation_kwargs(self, **overrides) -> dict:
+        kwargs = {key: value for key, value in (("ref_audio", self.ref_audio), ("ref_text", self.ref_text)) if value}
+        return {**kwargs, **self.options, **overrides}
+
+def forget_reference(ref_audio: Optional[str]):
+    """
+    Delete a clip preprocess_ref_audio_text wrote for a one-off reference. f5_tts
+    memoizes processed clips and their transcripts by content hash for the life
+    of the process, so those entries are dropped with it.
+    """
+    if not ref_audio:
+        return
+    audio_cache = getattr(utils_infer, "_ref_audio_cache", {})
+    for key in [key for key, path in audio_cache.items() if path == ref_audio]:
+        audio_cache.pop(key, None)
+        getattr(utils_infer, "_ref_text_cache", {}).pop(key, None)
+    if os.path.exists(ref_audio):
+        os.unlink(ref_audio)
+
 # Enhanced TTSManager
 class TTSManager:
     def __init__(self):
-        self.tts_models: Dict[str, TTSInference] = {}
+        # One copy of the base weights shared by every voice
+        self.base_model = TTSInference(model="F5-TTS")
+        # The model is not safe to run from several threads at once
+        self.model_lock = threading.Lock()
+        self.catalog = voice_catalog
+        self.default_config = {
+            "ref_audio": "voice_configs/default.wav",  # You'll need a default reference audio
+            "ref_text": "Default reference text"  # And its transcription
+        }
+        # Prepared voices in least recently used order
+        self.voices: "OrderedDict[str, VoiceConditioning]" = OrderedDict()
+        self.last_used: Dict[str, float] = {}
+        self.pinned_voices = set(PINNED_VOICES)
+        self.voice_counters = {"loads": 0, "evictions": 0}
+        self.voices_lock = threading.Lock()
+        # Voices being prepared, so concurrent first uses share one preparation
+        self.preparing: Dict[str, Future] = {}
+        self.voice_fingerprints: Dict[str, str] = {}
+        self.synthesis_cache = SynthesisCache(CACHE_DIR, CACHE_MEMORY_BYTES, CACHE_DISK_BYTES)
+        self.synthesis_queue = SynthesisQueue(self.generate)
         self.realtime_tts = RealTimeInference()
         self.speech_editor = SpeechEditor()
         self.webhook_configs: Dict[str, WebhookConfig] = {}
-        self.load_voice_configs()
+        self.webhook_dispatcher = webhook_dispatcher
+        # Drop anything derived from a voice config when the file changes
+        self.catalog.on_change(self.invalidate_voice)
+        for voice_id in self.pinned_voices:
+            if self.config_for(voice_id) is not None:
+                self.get_voice(voice_id)
+
+    def config_for(self, voice_id: Optional[str]) -> Optional[dict]:
+        if voice_id == "default":
+            return self.default_config
+        return self.catalog.get(voice_id)
+
+    def invalidate_voice(self, voice_id: str):
+        with self.voices_lock:
+            self.voices.pop(voice_id, None)
+            self.last_used.pop(voice_id, None)
+            self.voice_fingerprints.pop(voice_id, None)
+            # A preparation already running finishes, but isn't cached
+            self.preparing.pop(voice_id, None)
 
-    def load_voice_configs(self):
+    def prepare_voice(self, voice_id: str) -> VoiceConditioning:
+        config = self.config_for(voice_id)
+        options = {key: value for key, value in config.items() if key not in VOICE_METADATA_KEYS}
         try:
-            # Initialize default model with CLI interface
-            self.tts_models["default"] = TTSInference(
-                model="F5-TTS",
-                ref_audio="voice_configs/default.wav",  # You'll need a default reference audio
-                ref_text="Default reference text"  # And its transcription
-            )
-            
-            config_dir = Path("voice_configs")
-            if config_dir.exists():
-                for config_file in config_dir.glob("*.toml"):
-                    with open(config_file, "rb") as f:
-                        config = tomli.load(f)
-                        voice_id = config_file.stem
-                        self.tts_models[voice_id] = TTSInference(
-                            model="F5-TTS",
-                            ref_audio=config.get("ref_audio"),
-                            ref_text=config.get("ref_text"),
-                            **config
-                        )
+            # Clips the reference to the usable length and transcribes it if no text is given
+            ref_audio, ref_text = preprocess_ref_audio_text(config.get("ref_audio"), config.get("ref_text") or "")
         except Exception as e:
-            print(f"Error loading TTS models: {e}")
-            self.tts_models["default"] = TTSInference()
+            if voice_id != "default":
+                raise
+            # Fall back to the model's built-in reference voice
+            print(f"Error loading default voice: {e}")
+            return VoiceConditioning(None, None, options)
+        return VoiceConditioning(ref_audio, ref_text, options)
 
-    def generate_speech(self, text: str, voice_id: Optional[str] = None, **kwargs):
+    def get_voice(self, voice_id: str) -> VoiceConditioning:
+        with self.voices_lock:
+            voice = self.voices.get(voice_id)
+            if voice is not None:
+                self.voices.move_to_end(voice_id)
+                self.last_used[voice_id] = time.time()
+                return voice
+            pending = self.preparing.get(voice_id)
+            if pending is None:
+                pending = self.preparing[voice_id] = Future()
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            return pending.result()
+
+        # Preparing can mean a Whisper transcription, so it runs outside the lock
         try:
-            model = self.tts_models.get(voice_id, self.tts_models["default"])
-            return model.generate(
-                gen_text=text,
+            voice = self.prepare_voice(voice_id)
+        except BaseException as e:
+            with self.voices_lock:
+                if self.preparing.get(voice_id) is pending:
+                    del self.preparing[voice_id]
+            pending.set_exception(e)
+            raise
+        with self.voices_lock:
+            if self.preparing.get(voice_id) is pending:
+                del self.preparing[voice_id]
+                self.voices[voice_id] = voice
+                self.voice_counters["loads"] += 1
+                self.evict_over_capacity(keep=voice_id)
+                self.last_used[voice_id] = time.time()
+        pending.set_result(voice)
+        return voice
+
+    def pin_voice(self, voice_id: str):
+        self.pinned_voices.add(voice_id)
+        self.get_voice(voice_id)
+
+    def unpin_voice(self, voice_id: str):
+        self.pinned_voices.discard(voice_id)
+
+    def _evict_voice(self, voice_id: str):
+        # Callers hold voices_lock
+        self.voices.pop(voice_id, None)
+        self.last_used.pop(voice_id, None)
+        self.voice_counters["evictions"] += 1
+
+    def evict_over_capacity(self, keep: Optional[str] = None):
+        for voice_id in list(self.voices):
+            if len(self.voices) <= VOICE_CACHE_SIZE:
+                break
+            if voice_id in self.pinned_voices or voice_id == keep:
+                continue
+            self._evict_voice(voice_id)
+
+    def evict_idle_voices(self):
+        cutoff = time.time() - VOICE_IDLE_SECONDS
+        with self.voices_lock:
+            for voice_id in list(self.voices):
+                if voice_id not in self.pinned_voices and self.last_used.get(voice_id, 0) < cutoff:
+                    self._evict_voice(voice_id)
+
+    def voice_stats(self) -> dict:
+        with self.voices_lock:
+            return {
+                **self.voice_counters,
+                "voices": len(self.catalog) + 1,
+                "loaded": list(self.voices),
+                "pinned": sorted(self.pinned_voices),
+                "capacity": VOICE_CACHE_SIZE,
+            }
+
+    def fingerprint_voice(self, voice_id: str) -> str:
+        # Identify a voice by its reference audio content rather than its path.
+        # Computed on first use and dropped when the config changes.
+        fingerprint = self.voice_fingerprints.get(voice_id)
+        if fingerprint is not None:
+            return fingerprint
+        config = dict(self.config_for(voice_id))
+        ref_audio = config.get("ref_audio")
+        if ref_audio and os.path.exists(ref_audio):
+            config["ref_audio"] = file_fingerprint(ref_audio)
+        fingerprint = hashlib.sha256(
+            json.dumps(config, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+        self.voice_fingerprints[voice_id] = fingerprint
+        return fingerprint
+
+    def generate(self, voice_id: str, text: str, **kwargs) -> AudioBuffer:
+        kwargs = self.get_voice(voice_id).generation_kwargs(**kwargs)
+        with self.model_lock:
+            result = self.base_model.generate(gen_text=text, **kwargs)
+        return AudioBuffer.from_result(result)
+
+    def resynthesize(self, context: AudioBuffer, text: str, **kwargs) -> AudioBuffer:
+        # Use the audio around an edit as the reference so new words match the speaker and room.
+        # The model takes its reference as a path, and an empty ref_text has it transcribed.
+        # Every context is new, so the processed clip is deleted once generated from.
+        # Transcribing it takes seconds, so like prepare_voice it happens outside the model lock.
+        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
+            temp_file.write(context.wav_bytes())
+        ref_audio = None
+        try:
+            ref_audio, ref_text = preprocess_ref_audio_text(temp_file.name, "")
+            with self.model_lock:
+                return AudioBuffer.from_result(
+                    self.base_model.generate(gen_text=text, ref_audio=ref_audio, ref_text=ref_text, **kwargs)
+                )
+        finally:
+            os.unlink(temp_file.name)
+            forget_reference(ref_audio)
+
+    async def generate_speech(self, text: str, voice_id: Optional[str] = None, admit: bool = False,
+                              **kwargs) -> AudioBuffer:
+        """
+        Render `text`, from the cache when possible. With `admit`, a cache miss
+        must get past admission control first and may raise admission.Overloaded.
+        """
+        try:
+            if self.config_for(voice_id) is None:
+                voice_id = "default"
+            cache_key = self.synthesis_cache.make_key(
+                text,
+                voice=self.fingerprint_voice(voice_id),
                 **kwargs
             )
+            cached = await self.synthesis_cache.aget(cache_key)
+            if cached is not None:
+                audio = AudioBuffer.from_wav(cached)
+                audio.cache_key = cache_key
+                audio.cached = True
+                return audio
+
+            ticket = admission_controller.admit(len(text)) if admit else None
+            try:
+                chunks = plan_chunks(text) or [text]
+                if len(chunks) == 1:
+                    audio = await self.synthesis_queue.submit(voice_id, text, **kwargs)
+                else:
+                    # Chunks of a long text are queued together, so they render back to back
+                    audio = AudioBuffer.concat(await asyncio.gather(*[
+                        self.synthesis_queue.submit(voice_id, chunk, **kwargs) for chunk in chunks
+                    ]))
+            except Exception:
+                if ticket:
+                    admission_controller.finish(ticket)
+                raise
+            if ticket:
+                admission_controller.finish(ticket, audio.duration)
+            await self.synthesis_cache.aput(cache_key, audio.wav_bytes())
+            audio.cache_key = cache_key
+            return audio
         except Exception as e:
             print(f"Error generating speech: {e}")
             raise
 
     async def send_webhook(self, event: str, data: dict):
+        # Queued for every subscriber at once; delivery and retries run in the background
+        payload = {
+            "event": event,
+            "timestamp": datetime.utcnow().isoformat(),
+            "data": data
+        }
         for config in self.webhook_configs.values():
             if config.is_active and event in config.events:
-                try:
-                    async with httpx.AsyncClient() as client:
-                        await client.post(str(config.url), json={
-                            "event": event,
-                            "timestamp": datetime.utcnow().isoformat(),
-                            "data": data
-                        })
-                except Exception as e:
-                    print(f"Webhook delivery failed: {e}")
+                self.webhook_dispatcher.enqueue(str(config.url), payload, batch=config.batch_events)
 
 tts_manager = TTSManager()
 
+@app.on_event("startup")
+async def start_voice_sweeper():
+    async def sweep():
+        while True:
+            await asyncio.sleep(60)
+            tts_manager.evict_idle_voices()
+    # Keep a reference so the task isn't garbage collected
+    app.state.voice_sweeper = asyncio.create_task(sweep())
+
+@app.on_event("startup")
+async def start_webhook_dispatcher():
+    await webhook_dispatcher.start()
+
+@app.on_event("shutdown")
+async def stop_webhook_dispatcher():
+    await webhook_dispatcher.stop()
+
+@app.on_event("shutdown")
+async def close_audio_store():
+    await audio_store.close()
+
+@app.on_event("startup")
+async def start_catalog_refresh():
+    async def refresh():
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(CATALOG_REFRESH_SECONDS)
+            try:
+                await loop.run_in_executor(None, voice_catalog.refresh)
+            except Exception as e:
+                print(f"Voice catalog refresh failed: {e}")
+    app.state.catalog_refresh = asyncio.create_task(refresh())
+
+def wav_stream_header(sample_rate: int, channels: int = 1, sample_width: int = 2) -> bytes:
+    """
+    WAV header for a stream of unknown length. The RIFF and data sizes are set to
+    the maximum so players keep reading until the connection closes.
+    """
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 0xFFFFFFFF, b"WAVE",
+        b"fmt ", 16, 1, channels, sample_rate,
+        sample_rate * channels * sample_width, channels * sample_width, sample_width * 8,
+        b"data", 0xFFFFFFFF
+    )
+
 # Enhanced endpoints
 @app.post("/api/tts")
 async def text_to_speech(
     request: TTSRequest,
+    http_request: Request,
     background_tasks: BackgroundTasks,
     current_user = Depends(get_current_user)
 ):
+    format = request.format or audio_encoding.negotiate(http_request.headers.get("accept")) or "wav"
+    if format not in audio_encoding.FORMATS:
+        raise HTTPException(status_code=400, detail="format must be one of " + ", ".join(audio_encoding.FORMATS))
     try:
-        audio_path = tts_manager.generate_speech(
+        audio = await tts_manager.generate_speech(
             text=request.text,
             voice_id=request.voice_id,
+            admit=True,
             style=request.style,
             language=request.language,
             speed=request.speed,
@@ -159,11 +1525,14 @@ async def text_to_speech(
             energy=request.energy
         )
         
-        with open(audio_path, "rb") as f:
-            file_path = f"tts_output/{current_user.id}/{os.path.basename(audio_path)}"
-            supabase.storage.from_("audio").upload(file_path, f)
-            
-        audio_url = supabase.storage.from_("audio").get_public_url(file_path)
+        # Streamed up without blocking the loop, so uploads overlap with other requests
+        audio_format = audio_encoding.FORMATS[format]
+        file_path = f"tts_output/{current_user.id}/{uuid.uuid4().hex}{audio_format.extension}"
+        if format == "wav":
+            audio_url = await audio_store.upload(file_path, audio.iter_wav(), size=audio.wav_size)
+        else:
+            encoded = await encode_audio(audio, format)
+            audio_url = await audio_store.upload(file_path, encoded, content_type=audio_format.media_type)
         
         background_tasks.add_task(
             tts_manager.send_webhook,
@@ -171,7 +1540,9 @@ async def text_to_speech(
             {"user_id": current_user.id, "audio_url": audio_url}
         )
         
-        return {"audio_url": audio_url}
+        return {"audio_url": audio_url, "format": format}
+    except admission.Overloaded as e:
+        raise too_busy(e)
     except Exception as e:
         background_tasks.add_task(
             tts_manager.send_webhook,
@@ -180,6 +1551,80 @@ async def text_to_speech(
         )
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/tts/stream")
+async def text_to_speech_stream(
+    request: TTSRequest,
+    format: str = "wav",
+    current_user = Depends(get_current_user)
+):
+    """
+    Stream audio sentence by sentence over a chunked response instead of uploading
+    the finished file. `format=wav` streams a WAV file, `format=pcm` streams raw
+    little-endian PCM described by the X-Sample-* headers.
+    """
+    if format not in ("wav", "pcm"):
+        raise HTTPException(status_code=400, detail="format must be 'wav' or 'pcm'")
+    sentences = plan_stream_chunks(request.text)
+    if not sentences:
+        raise HTTPException(status_code=400, detail="Text is empty")
+
+    generation_params = dict(
+        voice_id=request.voice_id,
+        style=request.style,
+        language=request.language,
+        speed=request.speed,
+        pitch=request.pitch,
+        energy=request.energy
+    )
+
+    try:
+        # Admitted as a whole: once the response has started it can't be refused
+        ticket = admission_controller.admit(len(request.text))
+    except admission.Overloaded as e:
+        raise too_busy(e)
+    rendered = {"seconds": 0.0, "chars": 0}
+
+    def tally(sentence: str, audio: AudioBuffer):
+        # Cached sentences say nothing about how fast the instance renders
+        if not audio.cached:
+            rendered["seconds"] += audio.duration
+            rendered["chars"] += len(sentence)
+
+    try:
+        # The first sentence fixes the stream format, so render it before responding
+        first = await tts_manager.generate_speech(text=sentences[0], **generation_params)
+        tally(sentences[0], first)
+    except Exception as e:
+        admission_controller.finish(ticket)
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def audio_stream():
+        completed = False
+        try:
+            if format == "wav":
+                yield wav_stream_header(first.sample_rate, first.channels, first.sample_width)
+            yield first.pcm
+            for sentence in sentences[1:]:
+                audio = await tts_manager.generate_speech(text=sentence, **generation_params)
+                tally(sentence, audio)
+                yield audio.pcm
+            completed = True
+        finally:
+            admission_controller.finish(ticket, rendered["seconds"] if completed else None, rendered["chars"])
+
+    stream = audio_stream()
+    # A stream dropped before its first chunk never runs, so release its ticket when it is collected
+    weakref.finalize(stream, admission_controller.finish, ticket)
+
+    sample_format = f"s{first.sample_width * 8}le" if first.sample_width > 1 else "u8"
+    # audio/L16 would mean big-endian (RFC 2586), so raw PCM goes out untyped
+    media_type = "audio/wav" if format == "wav" else "application/octet-stream"
+    return StreamingResponse(stream, media_type=media_type, headers={
+        "X-Sample-Rate": str(first.sample_rate),
+        "X-Channels": str(first.channels),
+        "X-Sample-Format": sample_format
+    })
+
 @app.post("/api/webhooks")
 async def configure_webhook(
     config: WebhookConfig,
@@ -193,26 +1638,143 @@ async def configure_webhook(
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/voices")
-async def list_voices(current_user = Depends(get_current_user)):
+async def list_voices(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(VOICE_PAGE_SIZE, ge=1, le=VOICE_PAGE_MAX),
+    language: Optional[str] = None,
+    gender: Optional[str] = None,
+    accent: Optional[str] = None,
+    style_tags: Optional[List[str]] = Query(None),
+    current_user = Depends(get_current_user)
+):
+    # Served from the in-memory catalog; a page is identified by the catalog
+    # version and the query, so clients revalidate with If-None-Match
+    etag = '"{}"'.format(hashlib.sha256(
+        f"{voice_catalog.etag}?{request.url.query}".encode("utf-8")
+    ).hexdigest()[:32])
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    filters = {
+        field: [value] for field, value in (("language", language), ("gender", gender), ("accent", accent)) if value
+    }
+    # Tags may be repeated or comma separated; a voice must carry all of them
+    tags = [tag for value in style_tags or [] for tag in value.split(",") if tag.strip()]
+    if tags:
+        filters["style_tags"] = tags
+    after = None
+    if cursor:
+        try:
+            after = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    voices, last = voice_catalog.search(filters, after=after, limit=limit)
+    next_cursor = base64.urlsafe_b64encode(last.encode("utf-8")).decode("ascii") if last else None
+    content = json.dumps({"voices": voices, "next_cursor": next_cursor}).encode("utf-8")
+    return Response(content=content, media_type="application/json", headers=headers)
+
+@app.get("/api/cache/stats")
+async def cache_stats(current_user = Depends(get_current_user)):
+    return tts_manager.synthesis_cache.stats()
+
+@app.get("/api/voice-models/stats")
+async def voice_model_stats(current_user = Depends(get_current_user)):
+    return tts_manager.voice_stats()
+
+@app.post("/api/voice-models/{voice_id}/pin")
+async def pin_voice_model(voice_id: str, current_user = Depends(get_current_user)):
+    if tts_manager.config_for(voice_id) is None:
+        raise HTTPException(status_code=404, detail="Voice not found")
+    await asyncio.get_running_loop().run_in_executor(None, tts_manager.pin_voice, voice_id)
+    return {"status": "success", "voice_id": voice_id, "pinned": True}
+
+@app.delete("/api/voice-models/{voice_id}/pin")
+async def unpin_voice_model(voice_id: str, current_user = Depends(get_current_user)):
+    tts_manager.unpin_voice(voice_id)
+    return {"status": "success", "voice_id": voice_id, "pinned": False}
+
+@app.get("/api/webhooks/stats")
+async def webhook_stats(current_user = Depends(get_current_user)):
+    return webhook_dispatcher.stats()
+
+@app.get("/api/auth/stats")
+async def auth_stats(current_user = Depends(get_current_user)):
+    return token_verifier.stats()
+
+@app.get("/api/encoder/stats")
+async def encoder_stats(current_user = Depends(get_current_user)):
+    return encoder_pool.stats()
+
+@app.get("/api/admission/stats")
+async def admission_stats(current_user = Depends(get_current_user)):
+    return admission_controller.stats()
+
+@app.get("/api/synthesis-queue/stats")
+async def synthesis_queue_stats(current_user = Depends(get_current_user)):
+    return tts_manager.synthesis_queue.stats()
+
+# Field each edit operation can't do without
+EDIT_OPERATION_FIELDS = {
+    "gain": "gain_db", "speed": "rate", "splice": "audio_url", "replace": "audio_url", "resynthesize": "text"
+}
+
+async def apply_edit_operations(audio_url: str, operations: List[EditOperation]) -> AudioBuffer:
+    operations = [operation.dict(exclude_none=True) for operation in operations]
+    for operation in operations:
+        if operation["type"] not in speech_editing.OPERATIONS:
+            raise ValueError(f"Unknown edit operation: {operation['type']}")
+        required = EDIT_OPERATION_FIELDS.get(operation["type"])
+        if required and required not in operation:
+            raise ValueError(f"{operation['type']} needs {required}")
+        if "voice_id" in operation and tts_manager.config_for(operation["voice_id"]) is None:
+            raise ValueError(f"Unknown voice: {operation['voice_id']}")
+
+    # The source and every clip it splices in are fetched together
+    urls = [audio_url] + sorted({operation["audio_url"] for operation in operations if "audio_url" in operation} - {audio_url})
+    downloads = await asyncio.gather(*[audio_store.download(url) for url in urls])
+    buffers = {url: AudioBuffer.from_wav(data) for url, data in zip(urls, downloads)}
+    target = buffers[audio_url]
+
+    synthesized_seconds = []
+
+    def synthesize(operation: dict, before: np.ndarray, after: np.ndarray) -> np.ndarray:
+        # Called from the render thread with just the audio around the edited span
+        if "voice_id" in operation:
+            audio = tts_manager.generate(operation["voice_id"], operation["text"])
+        else:
+            context = AudioBuffer.from_samples(np.concatenate([before, after]), target.sample_rate)
+            audio = tts_manager.resynthesize(context, operation["text"])
+        synthesized_seconds.append(audio.duration)
+        return speech_editing.conform(audio.to_float(), audio.sample_rate, target.sample_rate, target.channels)
+
+    def render() -> AudioBuffer:
+        sources = {
+            url: speech_editing.conform(buffer.to_float(), buffer.sample_rate, target.sample_rate, target.channels)
+            for url, buffer in buffers.items() if url != audio_url
+        }
+        for operation in operations:
+            if "audio_url" in operation:
+                url = operation.pop("audio_url")
+                # The edited clip itself is the engine's unnamed source
+                operation["source"] = "" if url == audio_url else url
+        edited = speech_editing.edit(target.to_float(), target.sample_rate, operations, sources, synthesize)
+        return AudioBuffer.from_samples(edited, target.sample_rate)
+
+    # Only resynthesized text uses the model; raises admission.Overloaded when the instance is saturated
+    chars = sum(len(operation["text"]) for operation in operations if operation["type"] == "resynthesize")
+    ticket = admission_controller.admit(chars) if chars else None
     try:
-        voices = []
-        config_dir = Path("voice_configs")
-        if config_dir.exists():
-            for config_file in config_dir.glob("*.toml"):
-                with open(config_file, "rb") as f:
-                    config = tomli.load(f)
-                    voice_config = VoiceConfig(
-                        name=config.get("name", config_file.stem),
-                        language=config.get("language", "en"),
-                        gender=config.get("gender", "unknown"),
-                        accent=config.get("accent"),
-                        style_tags=config.get("style_tags", []),
-                        description=config.get("description")
-                    )
-                    voices.append(voice_config.dict())
-        return voices
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        edited = await asyncio.get_running_loop().run_in_executor(None, render)
+    except Exception:
+        if ticket:
+            admission_controller.finish(ticket)
+        raise
+    if ticket:
+        admission_controller.finish(ticket, sum(synthesized_seconds))
+    return edited
 
 @app.post("/api/speech-edit")
 async def edit_speech(
@@ -220,12 +1782,36 @@ async def edit_speech(
     background_tasks: BackgroundTasks,
     current_user = Depends(get_current_user)
 ):
+    if not request.operations and not request.edit_type:
+        raise HTTPException(status_code=400, detail="Give either operations or edit_type")
+    if request.operations:
+        try:
+            edited = await apply_edit_operations(request.audio_url, request.operations)
+            file_path = f"edited/{current_user.id}/{uuid.uuid4().hex}.wav"
+            audio_url = await audio_store.upload(file_path, edited.iter_wav(), size=edited.wav_size)
+        except admission.Overloaded as e:
+            raise too_busy(e)
+        except Exception as e:
+            background_tasks.add_task(
+                tts_manager.send_webhook,
+                "speech.edit_failed",
+                {"user_id": current_user.id, "error": str(e)}
+            )
+            status_code = 400 if isinstance(e, (ValueError, KeyError)) else 500
+            raise HTTPException(status_code=status_code, detail=str(e))
+        background_tasks.add_task(
+            tts_manager.send_webhook,
+            "speech.edited",
+            {"user_id": current_user.id, "audio_url": audio_url}
+        )
+        return {"audio_url": audio_url}
+
     try:
         # Download audio from URL
-        response = await supabase.storage.from_("audio").download(request.audio_url)
+        audio_data = await audio_store.download(request.audio_url)
         
         with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-            temp_file.write(response.data)
+            temp_file.write(audio_data)
             input_path = temp_file.name
         
         # Apply speech editing
@@ -237,11 +1823,8 @@ async def edit_speech(
         )
         
         # Upload edited audio
-        with open(output_path, "rb") as f:
-            file_path = f"edited/{current_user.id}/{os.path.basename(output_path)}"
-            supabase.storage.from_("audio").upload(file_path, f)
-            
-        audio_url = supabase.storage.from_("audio").get_public_url(file_path)
+        file_path = f"edited/{current_user.id}/{os.path.basename(output_path)}"
+        audio_url = await audio_store.upload(file_path, iter_file(output_path), size=os.path.getsize(output_path))
         
         background_tasks.add_task(
             tts_manager.send_webhook,
@@ -0,0 +1,187 @@
+"""
+In-memory speech editing over an edit decision list.
+
+An edit is an ordered list of operations on the audio timeline. Operations
+don't touch samples: they rewrite a list of spans, each pointing at a range of
+a source clip with its own gain and playback rate. Once every operation has
+been applied the spans are rendered in one pass, so a ten-step edit reads and
+writes each sample once.
+
+Times are in seconds on the timeline as it stands when the operation runs.
+
+A resynthesize operation replaces a span with newly generated speech. Only the
+span and a few seconds of context around it are rendered and sent to the
+model, so its cost follows the size of the edit rather than the clip.
+"""
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+OPERATIONS = ("trim", "gain", "speed", "splice", "replace", "resynthesize")
+
+# Audio either side of a resynthesized span that conditions the model
+DEFAULT_CONTEXT_SECONDS = 3.0
+# Crossfade at the seams of resynthesized speech
+DEFAULT_CROSSFADE_SECONDS = 0.02
+
+class Span:
+    __slots__ = ("source", "start", "end", "gain", "rate", "fade")
+
+    def __init__(self, source: str, start: int, end: int, gain: float = 1.0, rate: float = 1.0, fade: int = 0):
+        self.source = source
+        self.start = start
+        self.end = end
+        self.gain = gain
+        self.rate = rate
+        # Samples this span overlaps the audio before it, crossfading the seam
+        self.fade = fade
+
+    @property
+    def length(self) -> int:
+        # Length on the timeline, after the playback rate
+        return int(round((self.end - self.start) / self.rate))
+
+    def copy(self, **changes) -> "Span":
+        span = Span(self.source, self.start, self.end, self.gain, self.rate, self.fade)
+        for name, value in changes.items():
+            setattr(span, name, value)
+        return span
+
+def split(spans: List[Span], position: int) -> int:
+    """Split the span under timeline sample `position` and return the index of the span starting there."""
+    offset = 0
+    for index, span in enumerate(spans):
+        if position <= offset:
+            return index
+        if position < offset + span.length:
+            cut = span.start + int(round((position - offset) * span.rate))
+            spans[index:index + 1] = [span.copy(end=cut), span.copy(start=cut)]
+            return index + 1
+        offset += span.length
+    return len(spans)
+
+def select(spans: List[Span], start: int, end: Optional[int]):
+    """Split at the range boundaries and return the index range of the spans inside it."""
+    first = split(spans, start)
+    last = split(spans, end) if end is not None else len(spans)
+    return first, last
+
+def to_samples(seconds: Optional[float], sample_rate: int) -> Optional[int]:
+    if seconds is None:
+        return None
+    if seconds < 0:
+        raise ValueError("Times must not be negative")
+    return int(round(seconds * sample_rate))
+
+def apply_operation(spans: List[Span], operation: dict, sample_rate: int, sources: Dict[str, np.ndarray],
+                    synthesize: Optional[Callable] = None) -> List[Span]:
+    kind = operation["type"]
+    if kind not in OPERATIONS:
+        raise ValueError(f"Unknown edit operation: {kind}")
+    start = to_samples(operation.get("start"), sample_rate) or 0
+    end = to_samples(operation.get("end"), sample_rate)
+    if end is not None and end < start:
+        raise ValueError(f"{kind}: end is before start")
+
+    if kind == "trim":
+        # Keep only [start, end)
+        first, last = select(spans, start, end)
+        return spans[first:last]
+    if kind == "gain":
+        factor = 10 ** (operation["gain_db"] / 20)
+        first, last = select(spans, start, end)
+        spans[first:last] = [span.copy(gain=span.gain * factor) for span in spans[first:last]]
+        return spans
+    if kind == "speed":
+        rate = operation["rate"]
+        if rate <= 0:
+            raise ValueError("speed: rate must be positive")
+        first, last = select(spans, start, end)
+        spans[first:last] = [span.copy(rate=span.rate * rate) for span in spans[first:last]]
+        return spans
+
+    if kind == "resynthesize":
+        if synthesize is None:
+            raise ValueError("resynthesize is not available")
+        context = to_samples(operation.get("context", DEFAULT_CONTEXT_SECONDS), sample_rate)
+        end = end if end is not None else sum(span.length for span in spans)
+        # Render just the audio around the span; splitting a copy leaves the timeline alone
+        window = list(spans)
+        before = render(window[slice(*select(window, max(0, start - context), start))], sources)
+        window = list(spans)
+        after = render(window[slice(*select(window, end, end + context))], sources)
+        source = f"resynthesized:{len(sources)}"
+        sources[source] = synthesize(operation, before, after)
+        operation = {"crossfade": DEFAULT_CROSSFADE_SECONDS, **operation, "source": source}
+        kind = "replace"
+
+    source = operation["source"]
+    fade = to_samples(operation.get("crossfade"), sample_rate) or 0
+    clip = Span(source, 0, len(sources[source]), fade=fade)
+    if kind == "splice":
+        # Insert the clip at `at` (default: the end)
+        at = to_samples(operation.get("at"), sample_rate)
+        index = split(spans, at) if at is not None else len(spans)
+    else:
+        # replace: [start, end) is swapped for the clip
+        index, last = select(spans, start, end)
+        del spans[index:last]
+    spans[index:index] = [clip]
+    if fade and index + 1 < len(spans):
+        spans[index + 1] = spans[index + 1].copy(fade=fade)
+    return spans
+
+def resample(samples: np.ndarray, rate: float) -> np.ndarray:
+    # Linear interpolation; changes tempo and pitch together
+    positions = np.arange(int(round(len(samples) / rate))) * rate
+    indices = np.arange(len(samples))
+    return np.stack([np.interp(positions, indices, channel) for channel in samples.T], axis=1).astype(np.float32)
+
+def render(spans: List[Span], sources: Dict[str, np.ndarray]) -> np.ndarray:
+    """Render spans into one float32 array shaped (samples, channels)."""
+    channels = next(iter(sources.values())).shape[1]
+    total = sum(span.length for span in spans)
+    output = np.empty((total, channels), dtype=np.float32)
+    offset = 0
+    for span in spans:
+        samples = sources[span.source][span.start:span.end]
+        if span.rate != 1.0:
+            samples = resample(samples, span.rate)
+        samples = samples[:total - offset] * np.float32(span.gain)
+        fade = min(span.fade, offset, len(samples))
+        if fade:
+            # Equal-power crossfade over the overlap
+            curve = np.linspace(0.0, np.pi / 2, fade, dtype=np.float32)[:, None]
+            overlap = output[offset - fade:offset]
+            overlap[:] = overlap * np.cos(curve) + samples[:fade] * np.sin(curve)
+            samples = samples[fade:]
+        output[offset:offset + len(samples)] = samples
+        offset += len(samples)
+    return output[:offset]
+
+def edit(samples: np.ndarray, sample_rate: int, operations: List[dict],
+         sources: Optional[Dict[str, np.ndarray]] = None, synthesize: Optional[Callable] = None) -> np.ndarray:
+    """
+    Apply `operations` in order to `samples` (float32, shaped (samples, channels))
+    and return the edited audio. Splice and replace operations name their clip
+    in `sources`, which must share the sample rate and channel count.
+
+    `synthesize(operation, before, after)` renders a resynthesize operation's
+    text given the audio before and after the span, and returns it in the same
+    format as `samples`.
+    """
+    sources = {**(sources or {}), "": samples}
+    spans = [Span("", 0, len(samples))]
+    for operation in operations:
+        spans = apply_operation(spans, operation, sample_rate, sources, synthesize)
+    return render(spans, sources)
+
+def conform(samples: np.ndarray, sample_rate: int, target_rate: int, channels: int) -> np.ndarray:
+    """Bring a clip to the target sample rate and channel count so it can be spliced in."""
+    if samples.ndim == 1:
+        samples = samples[:, None]
+    if samples.shape[1] != channels:
+        samples = np.repeat(samples.mean(axis=1, keepdims=True), channels, axis=1)
+    if sample_rate != target_rate:
+        samples = resample(samples, sample_rate / target_rate)
+    return samples.astype(np.float32, copy=False)
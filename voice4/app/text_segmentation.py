@@ -0,0 +1,122 @@
+"""
+Sentence- and clause-aware segmentation of long text for synthesis.
+
+Generation cost grows faster than linearly with the length of a single run, so
+long inputs are cut into chunks close to the length the model renders most
+efficiently. Chunks are independent and can be rendered in parallel or batched,
+then joined in order.
+"""
+import re
+from typing import List
+
+# Chunk length with the best real-time factor for F5-TTS with a short reference
+# clip; re-measure with GoogleCloudRunTTS/benchmark_segmentation.py when the model changes
+DEFAULT_TARGET_CHARS = 150
+# Sentences longer than this are broken at clause boundaries, then between words
+DEFAULT_MAX_CHARS = 250
+
+ABBREVIATIONS = {
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "mt", "ft", "vs", "etc",
+    "nos", "vol", "figs", "approx", "dept", "inc", "ltd", "corp", "gov", "sen",
+    "capt", "lt", "sgt", "col", "jan", "feb", "apr", "jun", "jul", "aug", "sep",
+    "oct", "nov", "dec", "tue", "thu", "fri", "ave", "blvd", "rd",
+}
+# Abbreviations that are also everyday words ("he said no."), only taken as
+# abbreviations when capitalized
+CAPITALIZED_ABBREVIATIONS = {
+    "no", "fig", "est", "co", "gen", "rep", "rev", "hon", "mar", "sept", "mon",
+    "wed", "sat", "sun", "min", "max",
+}
+
+SENTENCE_END = re.compile(r"[.!?…]+[\"'”’)\]]*(?=\s|$)")
+CLAUSE_END = re.compile(r"[,;:]+[\"'”’)\]]*(?=\s)|\s[–—-]{1,2}(?=\s)")
+
+def is_false_stop(text: str, match: re.Match) -> bool:
+    """
+    A period after an abbreviation, an initial or before a lowercase word
+    doesn't end the sentence.
+    """
+    if match.group()[0] != ".":
+        return False
+    following = text[match.end():].lstrip()
+    if following and following[0].islower():
+        return True
+    preceding = re.search(r"(\S+)$", text[:match.start()])
+    if not preceding:
+        return False
+    original = preceding.group(1).lstrip("\"'(“‘[")
+    word = original.lower()
+    return (
+        word in ABBREVIATIONS
+        or (word in CAPITALIZED_ABBREVIATIONS and original[0].isupper())
+        or (len(word) == 1 and word.isalpha())
+        or re.fullmatch(r"(?:[a-z]\.)+[a-z]", word) is not None
+    )
+
+def split_at(text: str, pattern: re.Pattern) -> List[str]:
+    pieces, start = [], 0
+    for match in pattern.finditer(text):
+        pieces.append(text[start:match.end()].strip())
+        start = match.end()
+    pieces.append(text[start:].strip())
+    return [piece for piece in pieces if piece]
+
+def pack(pieces: List[str], limit: int) -> List[str]:
+    # Greedily join consecutive pieces while they fit in `limit` characters
+    chunks, current = [], ""
+    for piece in pieces:
+        if current and len(current) + 1 + len(piece) > limit:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current} {piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+def split_sentences(text: str) -> List[str]:
+    text = " ".join(text.split())
+    sentences, start = [], 0
+    for match in SENTENCE_END.finditer(text):
+        if is_false_stop(text, match):
+            continue
+        sentence = text[start:match.end()].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = match.end()
+    tail = text[start:].strip()
+    if tail:
+        sentences.append(tail)
+    return sentences
+
+def split_long_sentence(sentence: str, max_chars: int) -> List[str]:
+    if len(sentence) <= max_chars:
+        return [sentence]
+    pieces = []
+    for clause in split_at(sentence, CLAUSE_END):
+        if len(clause) <= max_chars:
+            pieces.append(clause)
+        else:
+            pieces.extend(pack(clause.split(" "), max_chars))
+    return pack(pieces, max_chars)
+
+def plan_chunks(text: str, target_chars: int = DEFAULT_TARGET_CHARS, max_chars: int = DEFAULT_MAX_CHARS) -> List[str]:
+    """
+    Split text into an ordered list of chunks made of whole sentences, each about
+    `target_chars` long. A single sentence is only split when it exceeds `max_chars`.
+    """
+    max_chars = max(max_chars, target_chars)
+    pieces = []
+    for sentence in split_sentences(text):
+        pieces.extend(split_long_sentence(sentence, max_chars))
+    return pack(pieces, target_chars)
+
+def plan_stream_chunks(text: str, max_chars: int = DEFAULT_MAX_CHARS) -> List[str]:
+    """
+    One chunk per sentence (long sentences split at `max_chars`), for streaming
+    where time to first audio matters more than throughput.
+    """
+    chunks = []
+    for sentence in split_sentences(text):
+        chunks.extend(split_long_sentence(sentence, max_chars))
+    return chunks
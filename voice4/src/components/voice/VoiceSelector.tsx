@@ -5,6 +5,7 @@ import { Button } from '../ui/Button';
 import toast from 'react-hot-toast';
 
 interface Voice {
+  voice_id: string;
   name: string;
   language: string;
   gender: string;
@@ -30,14 +31,22 @@ export function VoiceSelector({ onSelect, selectedVoice }: VoiceSelectorProps) {
 
   const fetchVoices = async () => {
     try {
-      const response = await fetch(`${API_URL}/api/voices`, {
-        headers: {
-          Authorization: `Bearer ${user?.id}`,
-        },
-      });
-      if (!response.ok) throw new Error('Failed to fetch voices');
-      const data = await response.json();
-      setVoices(data);
+      const loaded: Voice[] = [];
+      let cursor: string | null = null;
+      do {
+        const params = new URLSearchParams({ limit: '100' });
+        if (cursor) params.set('cursor', cursor);
+        const response = await fetch(`${API_URL}/api/voices?${params}`, {
+          headers: {
+            Authorization: `Bearer ${user?.id}`,
+          },
+        });
+        if (!response.ok) throw new Error('Failed to fetch voices');
+        const data = await response.json();
+        loaded.push(...data.voices);
+        cursor = data.next_cursor;
+      } while (cursor);
+      setVoices(loaded);
     } catch (error) {
       toast.error('Failed to load voices');
       console.error(error);
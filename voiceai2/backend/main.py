@@ -12,8 +12,13 @@ import tomli
 from pathlib import Path
 import tempfile
 import wave
+import io
+import json
+import struct
+import soundfile as sf
 from f5_tts.infer.cli import TTSInference
 from f5_tts.socket_server import RealTimeInference
+from text_segmentation import plan_stream_chunks
 
 load_dotenv()
 
@@ -36,13 +41,34 @@ supabase: Client = create_client(
     os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_SERVICE_KEY")
 )
 
+def model_sample_rate(*models) -> int:
+    """
+    Output rate of the first of `models` (or its vocoder) that exposes one.
+    Streams are described with it, so it is never guessed.
+    """
+    for model in models:
+        for candidate in (model, getattr(model, "vocoder", None)):
+            for attr in ("sample_rate", "target_sample_rate", "sampling_rate"):
+                rate = getattr(candidate, attr, None)
+                if rate:
+                    return int(rate)
+    raise RuntimeError("None of the loaded models exposes its output sample rate")
+
 # Initialize F5-TTS with different configurations
 class TTSManager:
     def __init__(self):
         self.tts_models: Dict[str, TTSInference] = {}
         self.realtime_tts = RealTimeInference()
+        self._sample_rate: Optional[int] = None
         self.load_voice_configs()
 
+    @property
+    def sample_rate(self) -> int:
+        # Looked up when a stream first needs it, so a model without one only fails /ws/tts
+        if self._sample_rate is None:
+            self._sample_rate = model_sample_rate(self.realtime_tts, self.tts_models["default"])
+        return self._sample_rate
+
     def load_voice_configs(self):
         # Load default model
         self.tts_models["default"] = TTSInference()
@@ -58,6 +84,112 @@ class TTSManager:
 
 tts_manager = TTSManager()
 
+# Wire formats for /ws/tts. "float32" is the original headerless stream.
+STREAM_FORMATS = ("float32", "int16", "flac", "opus")
+# Every frame except the legacy format starts with: uint32 sequence, uint32 sample count
+FRAME_HEADER = struct.Struct("<II")
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+# Encoded chunks a connection may generate ahead of what the client has received
+WS_QUEUE_CHUNKS = int(os.getenv("WS_QUEUE_CHUNKS", 8))
+
+# Live queue statistics for each open /ws/tts connection
+stream_stats: Dict[int, dict] = {}
+
+class StreamResampler:
+    """
+    Streaming downsampler: windowed-sinc low-pass followed by linear interpolation.
+    Filter history and the fractional read position carry over between chunks so
+    chunk boundaries don't click.
+    """
+
+    def __init__(self, src_rate: int, dst_rate: int, taps: int = 63):
+        self.step = src_rate / dst_rate
+        cutoff = 0.5 * min(1.0, dst_rate / src_rate)
+        n = np.arange(taps) - (taps - 1) / 2
+        kernel = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(taps)
+        self.kernel = (kernel / kernel.sum()).astype(np.float32)
+        self.history = np.zeros(taps - 1, dtype=np.float32)
+        self.tail = np.zeros(0, dtype=np.float32)
+        self.position = 0.0
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        samples = np.concatenate([self.history, chunk.astype(np.float32)])
+        self.history = samples[-len(self.history):]
+        filtered = np.concatenate([self.tail, np.convolve(samples, self.kernel, mode="valid")])
+        if len(filtered) < 2:
+            self.tail = filtered
+            return np.zeros(0, dtype=np.float32)
+        positions = np.arange(self.position, len(filtered) - 1, self.step)
+        self.position = (positions[-1] + self.step if len(positions) else self.position) - (len(filtered) - 1)
+        self.tail = filtered[-1:]
+        return np.interp(positions, np.arange(len(filtered)), filtered).astype(np.float32)
+
+class StreamEncoder:
+    """
+    Encodes audio chunks for one websocket connection in the negotiated format.
+    """
+
+    def __init__(self, format: str, src_rate: int, sample_rate: Optional[int] = None):
+        if format not in STREAM_FORMATS:
+            raise ValueError(f"format must be one of {', '.join(STREAM_FORMATS)}")
+        sample_rate = sample_rate or src_rate
+        if sample_rate > src_rate:
+            raise ValueError(f"sample_rate can't exceed the model rate of {src_rate}")
+        if format == "opus" and sample_rate not in OPUS_SAMPLE_RATES:
+            raise ValueError(f"opus needs a sample_rate of {', '.join(map(str, OPUS_SAMPLE_RATES))}")
+        if format in ("flac", "opus"):
+            codec = "FLAC" if format == "flac" else "OGG"
+            if codec not in sf.available_formats() or (format == "opus" and "OPUS" not in sf.available_subtypes("OGG")):
+                raise ValueError(f"{format} is not supported by this server")
+        self.format = format
+        self.src_rate = src_rate
+        self.sample_rate = sample_rate
+        self.sequence = 0
+        self.resampler = StreamResampler(src_rate, sample_rate) if sample_rate != src_rate else None
+
+    @property
+    def legacy(self) -> bool:
+        return self.format == "float32" and self.sample_rate == self.src_rate
+
+    def config(self) -> dict:
+        return {
+            "type": "config",
+            "format": self.format,
+            "sample_rate": self.sample_rate,
+            "channels": 1,
+            "frame_header": "uint32 sequence, uint32 sample_count (little-endian)",
+        }
+
+    def reset(self):
+        # Sequence numbers restart with every utterance
+        self.sequence = 0
+        if self.resampler:
+            self.resampler = StreamResampler(self.src_rate, self.sample_rate)
+
+    def encode(self, chunk: np.ndarray) -> bytes:
+        audio = np.asarray(chunk, dtype=np.float32).reshape(-1)
+        if self.legacy:
+            return audio.tobytes()
+        if self.resampler:
+            audio = self.resampler.process(audio)
+
+        if self.format == "float32":
+            payload = audio.tobytes()
+        elif self.format == "int16":
+            payload = (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+        else:
+            # Each frame is a self-contained file so clients can decode frames independently
+            buffer = io.BytesIO()
+            if self.format == "flac":
+                sf.write(buffer, audio, self.sample_rate, format="FLAC", subtype="PCM_16")
+            else:
+                sf.write(buffer, audio, self.sample_rate, format="OGG", subtype="OPUS")
+            payload = buffer.getvalue()
+
+        frame = FRAME_HEADER.pack(self.sequence, len(audio)) + payload
+        self.sequence += 1
+        return frame
+
 class TTSRequest(BaseModel):
     text: str
     voice_id: Optional[str] = None
@@ -69,33 +201,85 @@ class VoiceCloneRequest(BaseModel):
     reference_text: Optional[str] = None
 
 @app.websocket("/ws/tts")
-async def websocket_tts(websocket: WebSocket):
+async def websocket_tts(websocket: WebSocket, format: str = "float32", sample_rate: Optional[int] = None):
+    """
+    Streams synthesized audio. The wire format is negotiated with query parameters,
+    e.g. /ws/tts?format=int16&sample_rate=16000; without them chunks are sent as
+    headerless float32 at the model rate.
+    """
     await websocket.accept()
+    try:
+        encoder = StreamEncoder(format, tts_manager.sample_rate, sample_rate)
+    except ValueError as e:
+        await websocket.send_text(json.dumps({"type": "error", "detail": str(e)}))
+        await websocket.close(code=1003)
+        return
+    except RuntimeError as e:
+        await websocket.send_text(json.dumps({"type": "error", "detail": str(e)}))
+        await websocket.close(code=1011)
+        return
+    if not encoder.legacy:
+        await websocket.send_text(json.dumps(encoder.config()))
+
+    stats = {"queue_capacity": WS_QUEUE_CHUNKS, "queue_depth": 0, "max_queue_depth": 0, "chunks_sent": 0}
+    stream_stats[id(websocket)] = stats
     try:
         while True:
             data = await websocket.receive_text()
             request = TTSRequest.parse_raw(data)
-            
+            encoder.reset()
+
+            # Generation runs ahead of sending through a bounded queue: the next
+            # sentence renders while the current one goes out, and a slow client
+            # pauses generation once the queue is full.
+            queue: asyncio.Queue = asyncio.Queue(maxsize=WS_QUEUE_CHUNKS)
+            producer = asyncio.create_task(produce_audio(request, encoder, queue))
+            try:
+                while True:
+                    frame = await queue.get()
+                    if frame is None:
+                        break
+                    stats["queue_depth"] = queue.qsize()
+                    stats["max_queue_depth"] = max(stats["max_queue_depth"], queue.qsize() + 1)
+                    await websocket.send_bytes(frame)
+                    stats["chunks_sent"] += 1
+                await producer
+            finally:
+                producer.cancel()
+
+            if not encoder.legacy:
+                await websocket.send_text(json.dumps({"type": "stats", **stats}))
+            # Send end marker
+            await websocket.send_text("END_OF_AUDIO")
+
+    except Exception as e:
+        print(f"WebSocket error: {e}")
+    finally:
+        stream_stats.pop(id(websocket), None)
+        await websocket.close()
+
+async def produce_audio(request: TTSRequest, encoder: StreamEncoder, queue: asyncio.Queue):
+    try:
+        for sentence in plan_stream_chunks(request.text):
             # Use realtime TTS inference
             audio_generator = tts_manager.realtime_tts.generate_stream(
-                text=request.text,
+                text=sentence,
                 voice_id=request.voice_id,
                 style=request.style,
                 language=request.language
             )
-            
             async for audio_chunk in audio_generator:
-                # Convert numpy array to bytes
-                audio_bytes = audio_chunk.astype(np.float32).tobytes()
-                await websocket.send_bytes(audio_bytes)
-                
-            # Send end marker
-            await websocket.send_text("END_OF_AUDIO")
-            
-    except Exception as e:
-        print(f"WebSocket error: {e}")
-    finally:
-        await websocket.close()
+                await queue.put(encoder.encode(audio_chunk))
+    except Exception:
+        # Wake the sender so the error surfaces instead of it waiting forever
+        await queue.put(None)
+        raise
+    # End of utterance
+    await queue.put(None)
+
+@app.get("/api/stream-stats")
+async def get_stream_stats():
+    return {"connections": len(stream_stats), "streams": list(stream_stats.values())}
 
 @app.post("/api/tts")
 async def text_to_speech(request: TTSRequest):
@@ -3,6 +3,9 @@ import { TTSRequest } from '../types';
 import { API_URL } from '../config';
 import toast from 'react-hot-toast';
 
+// Each binary frame starts with a uint32 sequence number and a uint32 sample count
+const FRAME_HEADER_BYTES = 8;
+
 export function useTTS() {
   const [isLoading, setIsLoading] = useState(false);
   const [isStreaming, setIsStreaming] = useState(false);
@@ -22,7 +25,7 @@ export function useTTS() {
 
   const initWebSocket = () => {
     if (!websocketRef.current) {
-      websocketRef.current = new WebSocket(`ws://${API_URL.replace('http://', '')}/ws/tts`);
+      websocketRef.current = new WebSocket(`ws://${API_URL.replace('http://', '')}/ws/tts?format=flac`);
       audioContextRef.current = new AudioContext();
     }
   };
@@ -63,7 +66,9 @@ export function useTTS() {
 
         if (event.data instanceof Blob) {
           const arrayBuffer = await event.data.arrayBuffer();
-          const audioBuffer = await audioContextRef.current!.decodeAudioData(arrayBuffer);
+          const audioBuffer = await audioContextRef.current!.decodeAudioData(
+            arrayBuffer.slice(FRAME_HEADER_BYTES)
+          );
           const source = audioContextRef.current!.createBufferSource();
           source.buffer = audioBuffer;
           source.connect(audioContextRef.current!.destination);